@@ -0,0 +1,390 @@
+"""
+Pyjo.Reactor.EV.Asyncio - asyncio event loop on top of Pyjo.Reactor.EV
+=======================================================================
+::
+
+    import Pyjo.Reactor.EV.Asyncio
+
+    import asyncio
+
+    # Use the reactor of Pyjo.IOLoop for all asyncio loops
+    Pyjo.Reactor.EV.Asyncio.install()
+
+    async def main():
+        reader, writer = await asyncio.open_connection('127.0.0.1', 3000)
+        writer.write(b'GET / HTTP/1.1\\x0d\\x0a\\x0d\\x0a')
+        print(await reader.readline())
+        writer.close()
+
+    asyncio.run(main())
+
+:mod:`Pyjo.Reactor.EV.Asyncio` is an :mod:`asyncio` event loop which runs on a
+:mod:`Pyjo.Reactor.EV` reactor, so asyncio libraries and :mod:`Pyjo.IOLoop`
+services share one libev loop: one epoll set and one timer heap.
+
+Readers and writers are watched with :meth:`Pyjo.Reactor.EV.io` in combined
+mode, timers are reactor timers, ready callbacks are run from the run queue of
+the reactor with :meth:`Pyjo.Reactor.EV.next_tick` and callbacks from other
+threads use :meth:`Pyjo.Reactor.EV.call_soon_threadsafe`. Transports, servers
+and socket operations come from :class:`asyncio.selector_events.BaseSelectorEventLoop`.
+
+Subprocesses are not supported. Python 3.7 or newer is required.
+
+Classes
+-------
+"""
+
+import Pyjo.Reactor.EV
+
+import asyncio
+import asyncio.selector_events
+import selectors
+import sys
+import threading
+
+
+class Pyjo_Reactor_EV_Asyncio_Selector(selectors.BaseSelector):
+    """
+    Selector which registers file descriptors in the reactor instead of
+    waiting for them itself. Events are passed to the event loop as they come.
+    """
+
+    def __init__(self, reactor):
+        self.loop = None
+        self.reactor = reactor
+        self._keys = {}
+
+    def close(self):
+        for fd in list(self._keys):
+            self.reactor.remove(_Handle(fd))
+        self._keys.clear()
+
+    def get_key(self, fileobj):
+        return self._keys[_fileno(fileobj)]
+
+    def get_map(self):
+        return self._keys
+
+    def modify(self, fileobj, events, data=None):
+        fd = _fileno(fileobj)
+        key = self._keys[fd]
+        if events != key.events:
+            self.reactor.watch(_Handle(fd), events & selectors.EVENT_READ, events & selectors.EVENT_WRITE)
+        key = self._keys[fd] = selectors.SelectorKey(fileobj, fd, events, data)
+        return key
+
+    def register(self, fileobj, events, data=None):
+        fd = _fileno(fileobj)
+        if fd in self._keys:
+            raise KeyError('{0!r} (FD {1}) is already registered'.format(fileobj, fd))
+
+        key = self._keys[fd] = selectors.SelectorKey(fileobj, fd, events, data)
+        keys = self._keys
+
+        def io_cb(reactor, readable, writable):
+            key = keys.get(fd)
+            if key is not None:
+                mask = (selectors.EVENT_READ if readable else 0) | (selectors.EVENT_WRITE if writable else 0)
+                self.loop._process_events(((key, mask & key.events),))
+
+        handle = _Handle(fd)
+        self.reactor.io(io_cb, handle, combined=True)
+        self.reactor.watch(handle, events & selectors.EVENT_READ, events & selectors.EVENT_WRITE)
+
+        return key
+
+    def select(self, timeout=None):
+        # Events are dispatched by the reactor
+        return []
+
+    def unregister(self, fileobj):
+        key = self._keys.pop(_fileno(fileobj))
+        self.reactor.remove(_Handle(key.fd))
+        return key
+
+
+class Pyjo_Reactor_EV_Asyncio_TimerHandle(asyncio.TimerHandle):
+    """
+    :class:`asyncio.TimerHandle` which remembers its reactor timer.
+    """
+    __slots__ = ('_tid',)
+
+
+class Pyjo_Reactor_EV_Asyncio(asyncio.selector_events.BaseSelectorEventLoop):
+    """
+    :mod:`Pyjo.Reactor.EV.Asyncio` inherits all methods from
+    :class:`asyncio.selector_events.BaseSelectorEventLoop` and implements the
+    following new ones.
+    """
+
+    def __init__(self, reactor=None):
+        """::
+
+            loop = Pyjo.Reactor.EV.Asyncio.new()
+            loop = Pyjo.Reactor.EV.Asyncio.new(reactor)
+
+        Create a new event loop running on the given reactor, which defaults to
+        the reactor of :mod:`Pyjo.IOLoop` singleton.
+        """
+        if reactor is None:
+            import Pyjo.IOLoop
+            reactor = Pyjo.IOLoop.singleton.reactor
+
+        self.reactor = reactor
+        """::
+
+            reactor = loop.reactor
+
+        :mod:`Pyjo.Reactor.EV` object used by the loop.
+        """
+
+        self._next_tick = False
+        self._signal_wids = {}
+        self._timer_handles = {}
+
+        selector = Pyjo_Reactor_EV_Asyncio_Selector(reactor)
+        selector.loop = self
+
+        super(Pyjo_Reactor_EV_Asyncio, self).__init__(selector)
+
+    def add_signal_handler(self, sig, callback, *args):
+        """::
+
+            loop.add_signal_handler(signal.SIGTERM, callback, *args)
+
+        Invoke the callback when signal is delivered. Signals are watched with
+        :meth:`Pyjo.Reactor.EV.signal`.
+        """
+        self._check_closed()
+        self.remove_signal_handler(sig)
+        handle = asyncio.Handle(callback, args, self, None)
+
+        def signal_cb(reactor, signum):
+            self._add_callback(handle)
+
+        self._signal_wids[sig] = self.reactor.signal(signal_cb, sig)
+
+    def call_at(self, when, callback, *args, **kwargs):
+        """::
+
+            handle = loop.call_at(when, callback, *args)
+
+        Schedule the callback with a reactor timer.
+        """
+        self._check_closed()
+        if self._debug:
+            self._check_thread()
+            self._check_callback(callback, 'call_at')
+
+        timer = Pyjo_Reactor_EV_Asyncio_TimerHandle(when, callback, args, self, kwargs.get('context'))
+        if timer._source_traceback:
+            del timer._source_traceback[-1]
+
+        def timer_cb(reactor):
+            del self._timer_handles[timer._tid]
+            timer._scheduled = False
+            if not timer._cancelled:
+                timer._run()
+
+        timer._tid = self.reactor.timer(timer_cb, max(0, when - self.time()))
+        timer._scheduled = True
+        self._timer_handles[timer._tid] = timer
+
+        return timer
+
+    def call_soon_threadsafe(self, callback, *args, **kwargs):
+        """::
+
+            handle = loop.call_soon_threadsafe(callback, *args)
+
+        Schedule the callback from another thread with
+        :meth:`Pyjo.Reactor.EV.call_soon_threadsafe`.
+        """
+        self._check_closed()
+        if self._debug:
+            self._check_callback(callback, 'call_soon_threadsafe')
+
+        handle = asyncio.Handle(callback, args, self, kwargs.get('context'))
+        if handle._source_traceback:
+            del handle._source_traceback[-1]
+
+        self.reactor.call_soon_threadsafe(self._add_ready, handle)
+
+        return handle
+
+    def close(self):
+        """::
+
+            loop.close()
+
+        Close the loop and remove its handles, timers and signal watchers from
+        the reactor. The reactor itself is left running.
+        """
+        if self.is_closed():
+            return
+
+        for tid in self._timer_handles:
+            self.reactor.remove(tid)
+        self._timer_handles.clear()
+
+        for sig in list(self._signal_wids):
+            self.remove_signal_handler(sig)
+
+        super(Pyjo_Reactor_EV_Asyncio, self).close()
+
+    def remove_signal_handler(self, sig):
+        """::
+
+            boolean = loop.remove_signal_handler(signal.SIGTERM)
+
+        Remove signal handler.
+        """
+        wid = self._signal_wids.pop(sig, None)
+        if wid is None:
+            return False
+        return self.reactor.remove(wid)
+
+    def run_forever(self):
+        """::
+
+            loop.run_forever()
+
+        Run the reactor until :meth:`stop` is called.
+        """
+        if hasattr(self, '_run_forever_setup'):
+            self._run_forever_setup()
+            try:
+                self._run_reactor()
+            finally:
+                self._run_forever_cleanup()
+            return
+
+        self._check_closed()
+        self._check_running()
+        self._set_coroutine_origin_tracking(self._debug)
+
+        old_agen_hooks = sys.get_asyncgen_hooks()
+        try:
+            self._thread_id = threading.get_ident()
+            sys.set_asyncgen_hooks(firstiter=self._asyncgen_firstiter_hook,
+                                   finalizer=self._asyncgen_finalizer_hook)
+            asyncio.events._set_running_loop(self)
+            self._run_reactor()
+        finally:
+            self._stopping = False
+            self._thread_id = None
+            asyncio.events._set_running_loop(None)
+            self._set_coroutine_origin_tracking(False)
+            sys.set_asyncgen_hooks(*old_agen_hooks)
+
+    def stop(self):
+        """::
+
+            loop.stop()
+
+        Stop the loop and the reactor.
+        """
+        super(Pyjo_Reactor_EV_Asyncio, self).stop()
+        self.reactor.stop()
+
+    def _add_callback(self, handle):
+        if not handle._cancelled:
+            self._add_ready(self.reactor, handle)
+
+    def _add_ready(self, reactor, handle):
+        self._ready.append(handle)
+        if not self._next_tick:
+            self._next_tick = True
+            reactor.next_tick(self._run_ready)
+
+    def _call_soon(self, callback, args, context):
+        handle = asyncio.Handle(callback, args, self, context)
+        if handle._source_traceback:
+            del handle._source_traceback[-1]
+        self._add_ready(self.reactor, handle)
+        return handle
+
+    # Self pipe is not needed, other threads wake up the reactor with
+    # call_soon_threadsafe, and its read watcher would keep the shared reactor
+    # running forever
+    def _close_self_pipe(self):
+        pass
+
+    def _make_self_pipe(self):
+        pass
+
+    def _run_ready(self, reactor):
+        self._next_tick = False
+        if self._closed:
+            return
+
+        # Callbacks added meanwhile are run on next tick
+        ready = self._ready
+        for i in range(len(ready)):
+            handle = ready.popleft()
+            if not handle._cancelled:
+                handle._run()
+
+    def _run_reactor(self):
+        # Async watcher of the reactor does not keep the loop running, so
+        # without a reference the loop would not wait for other threads
+        loop = self.reactor._loop
+        loop.ref()
+        try:
+            while not self._stopping:
+                self.reactor.start()
+        finally:
+            loop.unref()
+
+    def _timer_handle_cancelled(self, handle):
+        if handle._scheduled:
+            handle._scheduled = False
+            del self._timer_handles[handle._tid]
+            self.reactor.remove(handle._tid)
+
+    def _write_to_self(self):
+        pass
+
+
+class Pyjo_Reactor_EV_Asyncio_Policy(asyncio.DefaultEventLoopPolicy):
+    """
+    Event loop policy which creates :mod:`Pyjo.Reactor.EV.Asyncio` loops. Loops
+    created in the main thread use the reactor of :mod:`Pyjo.IOLoop` singleton,
+    loops created in other threads get new reactors.
+    """
+
+    def new_event_loop(self):
+        if threading.current_thread() is threading.main_thread():
+            return Pyjo_Reactor_EV_Asyncio()
+        return Pyjo_Reactor_EV_Asyncio(Pyjo.Reactor.EV.new())
+
+
+class _Handle(object):
+    __slots__ = ('fd',)
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    def fileno(self):
+        return self.fd
+
+
+def _fileno(fileobj):
+    if isinstance(fileobj, int):
+        return fileobj
+    return fileobj.fileno()
+
+
+def install():
+    """::
+
+        Pyjo.Reactor.EV.Asyncio.install()
+
+    Set :class:`Pyjo_Reactor_EV_Asyncio_Policy` as :mod:`asyncio` event loop
+    policy.
+    """
+    asyncio.set_event_loop_policy(Pyjo_Reactor_EV_Asyncio_Policy())
+
+
+new = Pyjo_Reactor_EV_Asyncio
+object = Pyjo_Reactor_EV_Asyncio
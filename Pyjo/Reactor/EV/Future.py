@@ -0,0 +1,331 @@
+"""
+Pyjo.Reactor.EV.Future - Futures and tasks for Pyjo.Reactor.EV
+===============================================================
+::
+
+    import Pyjo.Reactor.EV
+
+    reactor = Pyjo.Reactor.EV.new()
+
+    async def echo(sock):
+        while True:
+            await reactor.readable(sock)
+            data = sock.recv(4096)
+            if not data:
+                break
+            sock.send(data)
+
+    async def main():
+        await reactor.sleep(0.5)
+        print('Half a second later')
+
+    task = reactor.spawn(main())
+    task.add_done_callback(lambda task: reactor.stop())
+    reactor.start()
+
+:mod:`Pyjo.Reactor.EV.Future` implements lightweight futures and tasks for
+:mod:`Pyjo.Reactor.EV`. Futures returned by :meth:`Pyjo.Reactor.EV.Pyjo_Reactor_EV.sleep`,
+:meth:`Pyjo.Reactor.EV.Pyjo_Reactor_EV.readable` and
+:meth:`Pyjo.Reactor.EV.Pyjo_Reactor_EV.writable` are resolved directly from
+libev watchers and the task waiting for them is resumed in the same
+callback, without :mod:`asyncio` or a trip through the run queue. A future is
+its own iterator, so awaiting it allocates nothing but the future.
+
+Tasks run native coroutines (``async def``) as well as generators which
+yield futures, so the same code works with Python 2. Generators return a value
+by raising :class:`Return`. ::
+
+    def main():
+        yield reactor.sleep(0.5)
+        print('Half a second later')
+        raise Pyjo.Reactor.EV.Future.Return(42)
+
+    reactor.spawn(main())
+
+Callbacks and tasks waiting for a future are invoked as soon as it is
+resolved. Errors from tasks nobody waits for and from done callbacks are
+reported with ``error`` event of the reactor.
+
+Classes
+-------
+"""
+
+
+class CancelledError(Exception):
+    """
+    Raised by awaiting a cancelled future or task.
+    """
+
+
+class InvalidStateError(Exception):
+    """
+    Raised by :meth:`Pyjo_Reactor_EV_Future.result` of a future which is not
+    resolved yet.
+    """
+
+
+class Return(Exception):
+    """
+    Raised by a generator run as a task to finish it with a value, which
+    generators can not return with Python 2.
+    """
+
+    def __init__(self, value=None):
+        super(Return, self).__init__(value)
+        self.value = value
+
+
+class Pyjo_Reactor_EV_Future(object):
+    """
+    Result of an operation which is not finished yet. Futures created with a
+    reactor invoke done callbacks in its sandbox.
+    """
+    __slots__ = ('_callbacks', '_done', '_exception', '_reactor', '_result', '_waiter', 'watcher')
+
+    def __init__(self, reactor=None):
+        self._callbacks = None
+        self._done = False
+        self._exception = None
+        self._reactor = reactor
+        self._result = None
+        self._waiter = None
+
+        self.watcher = None
+        """::
+
+            watcher = future.watcher
+
+        libev watcher which resolves the future, invoked to stop itself when the
+        future is cancelled.
+        """
+
+    def __await__(self):
+        return self
+
+    __iter__ = __await__
+
+    def __next__(self):
+        return self.send(None)
+
+    next = __next__
+
+    def add_done_callback(self, cb):
+        """::
+
+            future.add_done_callback(cb)
+
+        Invoke the callback with the future when it is resolved, or immediately
+        if it is resolved already. Errors from callbacks invoked on resolution
+        are reported with ``error`` event of the reactor the future was created
+        for.
+        """
+        if self._done:
+            cb(self)
+        elif self._callbacks is None:
+            self._callbacks = [cb]
+        else:
+            self._callbacks.append(cb)
+
+    def cancel(self):
+        """::
+
+            boolean = future.cancel()
+
+        Cancel the future and stop its watcher. Returns false if the future is
+        resolved already.
+        """
+        if self._done:
+            return False
+
+        # Watcher is stopped by its callback
+        watcher = self.watcher
+        if watcher is not None:
+            self.watcher = None
+            watcher.invoke(0)
+
+        self.set_exception(CancelledError())
+        return True
+
+    def cancelled(self):
+        """::
+
+            boolean = future.cancelled()
+
+        Check if the future was cancelled.
+        """
+        return isinstance(self._exception, CancelledError)
+
+    def done(self):
+        """::
+
+            boolean = future.done()
+
+        Check if the future is resolved.
+        """
+        return self._done
+
+    def exception(self):
+        """::
+
+            e = future.exception()
+
+        Return the exception the future was resolved with or ``None``.
+        """
+        return self._exception
+
+    def result(self):
+        """::
+
+            result = future.result()
+
+        Return the result of the future or raise its exception. Raises
+        :class:`InvalidStateError` if the future is not resolved yet.
+        """
+        if not self._done:
+            raise InvalidStateError('Result is not ready')
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def send(self, value):
+        # Coroutine awaiting the future is suspended until it is resolved
+        if not self._done:
+            return self
+        if self._exception is not None:
+            raise self._exception
+        raise StopIteration(self._result)
+
+    def set_exception(self, e):
+        """::
+
+            future.set_exception(e)
+
+        Resolve the future with an exception.
+        """
+        self._exception = e
+        self._resolve()
+
+    def set_result(self, result):
+        """::
+
+            future.set_result(result)
+
+        Resolve the future with a result.
+        """
+        self._result = result
+        self._resolve()
+
+    def throw(self, typ, val=None, tb=None):
+        if val is None:
+            val = typ() if isinstance(typ, type) else typ
+        raise val
+
+    def _resolve(self):
+        if self._done:
+            raise RuntimeError('Future already resolved')
+        self._done = True
+
+        waiter = self._waiter
+        if waiter is not None:
+            self._waiter = None
+            waiter._wakeup(self)
+
+        callbacks = self._callbacks
+        if callbacks is not None:
+            self._callbacks = None
+            reactor = self._reactor
+            for cb in callbacks:
+                if reactor is None:
+                    cb(self)
+                else:
+                    reactor._sandbox(self._callback, 'Future', cb)
+
+    def _callback(self, reactor, cb):
+        cb(self)
+
+    def _wait(self, task):
+        if self._waiter is None:
+            self._waiter = task
+        else:
+            self.add_done_callback(task._wakeup)
+
+
+class Pyjo_Reactor_EV_Task(Pyjo_Reactor_EV_Future):
+    """
+    Future resolved with the return value of a coroutine. Tasks are created
+    with :meth:`Pyjo.Reactor.EV.Pyjo_Reactor_EV.spawn`.
+    """
+    __slots__ = ('_cancel', '_coro', '_waiting')
+
+    def __init__(self, reactor, coro):
+        super(Pyjo_Reactor_EV_Task, self).__init__(reactor)
+        self._cancel = False
+        self._coro = coro
+        self._waiting = None
+
+    def cancel(self):
+        """::
+
+            boolean = task.cancel()
+
+        Cancel the task by raising :class:`CancelledError` in the coroutine.
+        Returns false if the task is finished already.
+        """
+        if self._done:
+            return False
+
+        self._cancel = True
+        if self._waiting is not None:
+            self._waiting.cancel()
+        return True
+
+    def _step(self, reactor, future=None):
+        value = error = None
+        if future is not None:
+            value, error = future._result, future._exception
+
+        # Cancellation is raised once, coroutine might catch it
+        if self._cancel:
+            self._cancel = False
+            if not isinstance(error, CancelledError):
+                error = CancelledError()
+
+        self._waiting = None
+        coro = self._coro
+
+        # Futures resolved already do not suspend the task
+        while True:
+            try:
+                if error is None:
+                    future = coro.send(value)
+                else:
+                    future = coro.throw(error)
+            except StopIteration as e:
+                self.set_result(e.args[0] if e.args else None)
+                return
+            except Return as e:
+                self.set_result(e.value)
+                return
+            except Exception as e:
+                nobody = self._waiter is None and self._callbacks is None
+                self.set_exception(e)
+                # Nobody to report the error to
+                if nobody and not isinstance(e, CancelledError):
+                    raise
+                return
+
+            if not isinstance(future, Pyjo_Reactor_EV_Future):
+                value, error = None, TypeError('Task got bad yield: {0!r}'.format(future))
+            elif future._done:
+                value, error = future._result, future._exception
+            else:
+                self._waiting = future
+                future._wait(self)
+                return
+
+    def _wakeup(self, future):
+        self._reactor._sandbox(self._step, 'Task', future)
+
+
+new = Pyjo_Reactor_EV_Future
+object = Pyjo_Reactor_EV_Future
@@ -0,0 +1,331 @@
+"""
+Pyjo.Reactor.EV.Handoff - Pre-forking supervisor handing connections to workers
+===============================================================================
+::
+
+    import Pyjo.Reactor.EV.Handoff
+
+    handoff = Pyjo.Reactor.EV.Handoff.new(workers=4, balance='lag')
+    handoff.listen(('0.0.0.0', 8080))
+
+    def worker(reactor, listeners, wid):
+
+        def accept_cb(reactor, connections):
+            for sock, address in connections:
+                reactor.reader(sock, read_cb)
+
+        reactor.acceptor(listeners[0], accept_cb)
+
+    handoff.run(worker)
+
+:mod:`Pyjo.Reactor.EV.Handoff` is a :mod:`Pyjo.Reactor.EV.Prefork` supervisor
+which accepts all connections itself and passes them to the least loaded
+worker over Unix sockets with ``SCM_RIGHTS``, instead of letting the kernel
+spread them by hash with ``SO_REUSEPORT``. This keeps a few heavy long-lived
+clients from piling up in one worker.
+
+Workers report their number of connections and loop lag to the supervisor
+every :attr:`Pyjo_Reactor_EV_Handoff.report_interval` seconds. Connections
+are counted as handles registered with the reactor of the worker. The
+listeners given to workers are stand-ins for listening sockets which can be
+passed to :meth:`Pyjo.Reactor.EV.Pyjo_Reactor_EV.acceptor`, so worker code
+works with both supervisors.
+
+Python 3 and Unix sockets with ``SOCK_SEQPACKET`` type are required.
+
+Events
+------
+
+:mod:`Pyjo.Reactor.EV.Handoff` inherits all events from
+:mod:`Pyjo.Reactor.EV.Prefork` and can emit the following new ones.
+
+drop
+~~~~
+::
+
+    @handoff.on
+    def drop(handoff, address):
+        ...
+
+Emitted when an accepted connection was closed because no worker could take
+it, with the address of the client.
+
+Classes
+-------
+"""
+
+import Pyjo.Reactor.EV
+import Pyjo.Reactor.EV.Prefork
+
+from Pyjo.Util import steady_time
+
+import array
+import errno
+import socket
+import struct
+
+
+REPORT = struct.Struct('!Id')
+
+FD_SIZE = array.array('i').itemsize
+
+
+class WorkerLoad(object):
+    __slots__ = ('channels', 'connections', 'lag', 'sent', 'wid')
+
+    def __init__(self, wid, channels):
+        self.channels = channels
+        self.connections = 0
+        self.lag = 0.0
+        self.sent = 0
+        self.wid = wid
+
+
+class Pyjo_Reactor_EV_Handoff(Pyjo.Reactor.EV.Prefork.object):
+    """
+    :mod:`Pyjo.Reactor.EV.Handoff` inherits all attributes and methods from
+    :mod:`Pyjo.Reactor.EV.Prefork` and implements the following new ones.
+    """
+
+    balance = 'connections'
+    """::
+
+        balance = handoff.balance
+        handoff.balance = 'lag'
+
+    Choose workers by least ``connections`` or least loop ``lag``, defaults to
+    ``connections``. Ties are broken by the other value.
+    """
+
+    report_interval = 0.1
+    """::
+
+        interval = handoff.report_interval
+        handoff.report_interval = 1
+
+    Seconds between load reports of workers, defaults to ``0.1``.
+    """
+
+    def __init__(self, **kwargs):
+        super(Pyjo_Reactor_EV_Handoff, self).__init__(**kwargs)
+
+        self.dropped = 0
+        """::
+
+            dropped = handoff.dropped
+
+        Number of accepted connections closed because channels of all workers
+        were full.
+        """
+
+        self._loads = {}
+        self._pairs = []
+
+    @property
+    def loads(self):
+        """::
+
+            loads = handoff.loads
+
+        Last reported load of running workers by worker number, as
+        ``(connections, lag)`` pairs. Connections handed to a worker since its
+        last report are included.
+        """
+        return dict((wid, (load.connections + load.sent, load.lag)) for wid, load in self._loads.items())
+
+    def run(self, cb):
+        """::
+
+            handoff.run(cb)
+
+        Start workers, accept connections and hand them to workers until
+        :meth:`stop` is called. The callback is invoked the same way as by
+        :meth:`Pyjo.Reactor.EV.Prefork.Pyjo_Reactor_EV_Prefork.run`.
+        """
+        reactor = self.reactor
+        for i, probe in enumerate(self._probes):
+            probe.listen(self.backlog)
+            reactor.acceptor(probe, lambda reactor, connections, i=i: self._handoff(i, connections))
+
+        try:
+            super(Pyjo_Reactor_EV_Handoff, self).run(cb)
+        finally:
+            for probe in self._probes:
+                reactor.remove(probe)
+            for wid in list(self._loads):
+                self._close(wid)
+
+    def _choose(self, skip):
+        loads = [load for load in self._loads.values() if load.wid not in skip]
+        if not loads:
+            return None
+        return min(loads, key=_by_lag if self.balance == 'lag' else _by_connections)
+
+    def _close(self, wid):
+        load = self._loads.pop(wid, None)
+        if load is None:
+            return
+
+        for channel in load.channels:
+            self.reactor.remove(channel)
+            channel.close()
+
+    def _handoff(self, i, connections):
+        for conn, address in connections:
+            fds = [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', [conn.fileno()]))]
+
+            # Workers which can not keep up are skipped for this connection,
+            # workers which are gone are removed
+            busy = set()
+            while True:
+                load = self._choose(busy)
+                if load is None:
+                    self.dropped += 1
+                    self.emit('drop', address)
+                    break
+                try:
+                    load.channels[i].sendmsg([b'\0'], fds)
+                except socket.error as e:
+                    if e.args[0] in Pyjo.Reactor.EV.NONBLOCKING:
+                        busy.add(load.wid)
+                    else:
+                        self._close(load.wid)
+                else:
+                    load.sent += 1
+                    break
+
+            conn.close()
+
+    def _listeners(self, reactor):
+        # Channels of other workers are inherited from the supervisor
+        for wid in self._loads:
+            for channel in self._loads[wid].channels:
+                channel.close()
+
+        channels = []
+        for parent, child in self._pairs:
+            parent.close()
+            child.setblocking(False)
+            channels.append(child)
+
+        interval = self.report_interval
+        last = [steady_time()]
+
+        def report_cb(reactor):
+            now = steady_time()
+            lag = max(0.0, now - last[0] - interval)
+            last[0] = now
+
+            connections = max(0, len(reactor._ios) - len(channels))
+            try:
+                channels[0].send(REPORT.pack(connections, lag))
+            except socket.error as e:
+                if e.args[0] not in Pyjo.Reactor.EV.NONBLOCKING:
+                    raise
+
+        if channels:
+            reactor.recurring(report_cb, interval)
+
+        return [_Channel(reactor, channel) for channel in channels]
+
+    def _reap(self, reactor, signum):
+        super(Pyjo_Reactor_EV_Handoff, self)._reap(reactor, signum)
+
+        running = set(wid for cb, wid in self._pids.values())
+        for wid in list(self._loads):
+            if wid not in running:
+                self._close(wid)
+
+    def _report(self, wid, channel):
+        load = self._loads.get(wid)
+        if load is None or load.channels[0] is not channel:
+            return
+
+        try:
+            data = channel.recv(REPORT.size)
+        except socket.error as e:
+            if e.args[0] in Pyjo.Reactor.EV.NONBLOCKING:
+                return
+            data = None
+
+        # Worker is gone
+        if not data:
+            self._close(wid)
+            return
+
+        load.connections, load.lag = REPORT.unpack(data)
+        load.sent = 0
+
+    def _spawn(self, cb, wid):
+        self._close(wid)
+        self._pairs = [socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET) for probe in self._probes]
+
+        # Only the supervisor returns
+        super(Pyjo_Reactor_EV_Handoff, self)._spawn(cb, wid)
+
+        channels = []
+        for parent, child in self._pairs:
+            child.close()
+            parent.setblocking(False)
+            channels.append(parent)
+        self._pairs = []
+
+        if channels:
+            self._loads[wid] = WorkerLoad(wid, channels)
+            channel = channels[0]
+            self.reactor.io(lambda reactor, writable: self._report(wid, channel), channel)
+            self.reactor.watch(channel, True, False)
+
+
+class _Channel(object):
+    __slots__ = ('reactor', 'sock')
+
+    def __init__(self, reactor, sock):
+        self.reactor = reactor
+        self.sock = sock
+
+    def accept(self):
+        msg, ancdata, flags, address = self.sock.recvmsg(1, socket.CMSG_LEN(FD_SIZE))
+
+        # Supervisor is gone
+        if not msg:
+            self.reactor.stop()
+            raise socket.error(errno.EAGAIN, 'Supervisor is gone')
+
+        fds = array.array('i')
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(data[:len(data) - len(data) % FD_SIZE])
+
+        if not fds:
+            raise socket.error(errno.ECONNABORTED, 'No connection received')
+
+        sock = socket.socket(fileno=fds[0])
+        try:
+            address = sock.getpeername()
+        except socket.error:
+            sock.close()
+            raise socket.error(errno.ECONNABORTED, 'Connection closed')
+
+        return sock, address
+
+    def close(self):
+        self.sock.close()
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def setblocking(self, flag):
+        self.sock.setblocking(flag)
+
+
+def _by_connections(load):
+    return load.connections + load.sent, load.lag
+
+
+def _by_lag(load):
+    return load.lag, load.connections + load.sent
+
+
+new = Pyjo_Reactor_EV_Handoff
+object = Pyjo_Reactor_EV_Handoff
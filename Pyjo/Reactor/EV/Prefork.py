@@ -0,0 +1,321 @@
+"""
+Pyjo.Reactor.EV.Prefork - Pre-forking supervisor for Pyjo.Reactor.EV
+=====================================================================
+::
+
+    import Pyjo.Reactor.EV.Prefork
+
+    prefork = Pyjo.Reactor.EV.Prefork.new(workers=4)
+    prefork.listen(('0.0.0.0', 8080))
+
+    def worker(reactor, listeners, wid):
+
+        def accept_cb(reactor, connections):
+            for sock, address in connections:
+                reactor.reader(sock, read_cb)
+
+        reactor.acceptor(listeners[0], accept_cb)
+
+    prefork.run(worker)
+
+:mod:`Pyjo.Reactor.EV.Prefork` runs a server on all cores. It forks
+:attr:`Pyjo_Reactor_EV_Prefork.workers` worker processes, each with a new
+:mod:`Pyjo.Reactor.EV` reactor and its own listening sockets bound with
+``SO_REUSEPORT``, so the kernel spreads new connections over the workers.
+Workers which exit are started again until the supervisor is stopped.
+
+The reactor of the supervisor should not use the ``signalfd`` loop flag, as
+the signal descriptor would be shared with workers which stop its watchers.
+Reactors created before ``fork``, like the one of :mod:`Pyjo.IOLoop`
+singleton, have to be reinitialised with
+:meth:`Pyjo.Reactor.EV.Pyjo_Reactor_EV.after_fork` before they are used in a
+worker.
+
+Signals
+-------
+
+The supervisor stops on ``INT`` and ``TERM`` signals, sending ``TERM`` to all
+workers and ``KILL`` to workers still running after
+:attr:`Pyjo_Reactor_EV_Prefork.graceful_timeout`. Workers ignore ``INT`` and
+stop their reactors on ``TERM`` or when the supervisor is gone.
+
+Events
+------
+
+:mod:`Pyjo.Reactor.EV.Prefork` inherits all events from
+:mod:`Pyjo.EventEmitter` and can emit the following new ones.
+
+reap
+~~~~
+::
+
+    @prefork.on
+    def reap(prefork, pid, wid, status):
+        ...
+
+Emitted when a worker exited, with the status from :func:`os.waitpid`.
+
+spawn
+~~~~~
+::
+
+    @prefork.on
+    def spawn(prefork, pid, wid):
+        ...
+
+Emitted when a worker was started.
+
+Classes
+-------
+"""
+
+import Pyjo.EventEmitter
+import Pyjo.Reactor.EV
+
+import errno
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import traceback
+
+
+class Pyjo_Reactor_EV_Prefork(Pyjo.EventEmitter.object):
+    """
+    :mod:`Pyjo.Reactor.EV.Prefork` inherits all attributes and methods from
+    :mod:`Pyjo.EventEmitter` and implements the following new ones.
+    """
+
+    backlog = socket.SOMAXCONN
+    """::
+
+        backlog = prefork.backlog
+        prefork.backlog = 128
+
+    Listen queue size of each worker, defaults to ``socket.SOMAXCONN``.
+    """
+
+    graceful_timeout = 10
+    """::
+
+        timeout = prefork.graceful_timeout
+        prefork.graceful_timeout = 30
+
+    Seconds to wait for workers to stop before killing them, defaults to
+    ``10``.
+    """
+
+    reactor = None
+    """::
+
+        reactor = prefork.reactor
+
+    Reactor of the supervisor, defaults to a new :mod:`Pyjo.Reactor.EV` object.
+    """
+
+    restart_delay = 1
+    """::
+
+        delay = prefork.restart_delay
+        prefork.restart_delay = 5
+
+    Seconds to wait before starting a worker again, defaults to ``1``, which
+    keeps a crashing worker from burning a core.
+    """
+
+    workers = multiprocessing.cpu_count()
+    """::
+
+        workers = prefork.workers
+        prefork.workers = 8
+
+    Number of worker processes, defaults to number of CPUs.
+    """
+
+    def __init__(self, **kwargs):
+        super(Pyjo_Reactor_EV_Prefork, self).__init__(**kwargs)
+
+        if self.reactor is None:
+            self.reactor = Pyjo.Reactor.EV.new()
+
+        self._addresses = []
+        self._pids = {}
+        self._probes = []
+        self._signals = []
+        self._stopping = False
+        self._tids = set()
+
+    def listen(self, address):
+        """::
+
+            address = prefork.listen(('0.0.0.0', 8080))
+            address = prefork.listen(('::1', 0))
+
+        Add a TCP address for workers to listen on and return it with the port
+        chosen by the kernel for port ``0``. The address stays reserved by the
+        supervisor, which does not accept connections itself.
+        """
+        family = socket.AF_INET6 if ':' in address[0] else socket.AF_INET
+        probe = _socket(family, address)
+        address = probe.getsockname()
+
+        self._addresses.append((family, address))
+        self._probes.append(probe)
+
+        return address
+
+    def run(self, cb):
+        """::
+
+            prefork.run(cb)
+
+        Start workers and supervise them until :meth:`stop` is called. Each
+        worker invokes the callback with a new reactor, the list of listening
+        sockets in the order of :meth:`listen` calls and the worker number,
+        and then starts the reactor. ::
+
+            def worker(reactor, listeners, wid):
+                reactor.acceptor(listeners[0], accept_cb)
+
+            prefork.run(worker)
+        """
+        reactor = self.reactor
+        self._stopping = False
+
+        self._signals = [reactor.signal(self._reap, signal.SIGCHLD)]
+        for signum in signal.SIGINT, signal.SIGTERM:
+            self._signals.append(reactor.signal(lambda reactor, signum: self.stop(), signum))
+
+        for wid in range(self.workers):
+            self._spawn(cb, wid)
+
+        reactor.start()
+
+        for remove in self._signals + list(self._tids):
+            reactor.remove(remove)
+        self._signals = []
+        self._tids.clear()
+
+    def stop(self):
+        """::
+
+            prefork.stop()
+
+        Stop all workers gracefully and return from :meth:`run` once they are
+        gone. Calling it again kills remaining workers.
+        """
+        signum = signal.SIGKILL if self._stopping else signal.SIGTERM
+        if not self._stopping:
+            self._stopping = True
+            self._timer(lambda: self._kill(signal.SIGKILL), self.graceful_timeout)
+
+        if not self._pids:
+            self.reactor.stop()
+        else:
+            self._kill(signum)
+
+    def _kill(self, signum):
+        for pid in self._pids:
+            try:
+                os.kill(pid, signum)
+            except OSError as e:
+                if e.errno != errno.ESRCH:
+                    raise
+
+    def _listeners(self, reactor):
+        listeners = []
+        for family, address in self._addresses:
+            sock = _socket(family, address)
+            sock.listen(self.backlog)
+            sock.setblocking(False)
+            listeners.append(sock)
+        return listeners
+
+    def _reap(self, reactor, signum):
+        for pid in list(self._pids):
+            try:
+                pid, status = os.waitpid(pid, os.WNOHANG)
+            except OSError as e:
+                if e.errno != errno.ECHILD:
+                    raise
+                status = 0
+            if not pid:
+                continue
+
+            cb, wid = self._pids.pop(pid)
+            self.emit('reap', pid, wid, status)
+
+            if not self._stopping:
+                self._timer(lambda cb=cb, wid=wid: self._stopping or self._spawn(cb, wid), self.restart_delay)
+
+        if self._stopping and not self._pids:
+            reactor.stop()
+
+    def _spawn(self, cb, wid):
+        pid = os.fork()
+        if pid:
+            self._pids[pid] = (cb, wid)
+            self.emit('spawn', pid, wid)
+            return
+
+        status = 0
+        try:
+            self._worker(cb, wid)
+        except SystemExit as e:
+            if isinstance(e.code, int):
+                status = e.code
+            elif e.code is not None:
+                status = 1
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def _timer(self, cb, after):
+
+        def timer_cb(reactor):
+            self._tids.discard(tid)
+            cb()
+
+        tid = self.reactor.timer(timer_cb, after)
+        self._tids.add(tid)
+
+    def _worker(self, cb, wid):
+        # Signals can be watched by only one loop in a process, so watchers of
+        # the supervisor are stopped, the rest of its reactor is left alone as
+        # the backend is shared with the parent process
+        for signal_wid in self._signals:
+            self.reactor.remove(signal_wid)
+        self._signals = []
+
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        for probe in self._probes:
+            probe.close()
+
+        reactor = Pyjo.Reactor.EV.new()
+        listeners = self._listeners(reactor)
+
+        parent = os.getppid()
+        reactor.signal(lambda reactor, signum: reactor.stop(), signal.SIGTERM)
+        reactor.recurring(lambda reactor: os.getppid() != parent and reactor.stop(), 1)
+
+        cb(reactor, listeners, wid)
+        reactor.start()
+
+
+def _socket(family, address):
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(address)
+    return sock
+
+
+new = Pyjo_Reactor_EV_Prefork
+object = Pyjo_Reactor_EV_Prefork
@@ -0,0 +1,165 @@
+"""
+Pyjo.Reactor.EV.Profiler - Sampling profiler for Pyjo.Reactor.EV
+=================================================================
+::
+
+    import Pyjo.Reactor.EV
+
+    reactor = Pyjo.Reactor.EV.new()
+    profiler = reactor.enable_profiler(interval=0.005)
+    reactor.start()
+
+    # Render with flamegraph.pl or speedscope
+    profiler.dump('reactor.collapsed')
+
+:mod:`Pyjo.Reactor.EV.Profiler` is a thread taking samples of the Python stack
+of the reactor thread, found with :func:`sys._current_frames`, every
+:attr:`Pyjo_Reactor_EV_Profiler.interval` seconds. Each sample is tagged with
+the file descriptor, timer id or watcher id and the name of the callback
+running at that moment, and counted in collapsed stack format, one line per
+distinct stack with frames separated by semicolons, which is understood by
+flame graph tools. ::
+
+    fd 7 app.read_cb;<module> (app.py:1);...;read_cb (app.py:21) 42
+    t3 app.refresh_cb;<module> (app.py:1);...;refresh_cb (app.py:30) 7
+
+Samples taken while the reactor waits for events are only counted in
+:attr:`Pyjo_Reactor_EV_Profiler.idle`, so the profile shows where the reactor
+thread spends the time it is busy. Blocking calls made by callbacks count as
+busy time. Note that the profiler thread can only run when the reactor thread
+releases the GIL, which happens at least every :func:`sys.getswitchinterval`
+seconds in Python code, so samples are spread evenly only for intervals
+longer than that.
+
+Classes
+-------
+"""
+
+from Pyjo.Reactor.EV.Watchdog import describe
+
+import sys
+import threading
+
+
+class Pyjo_Reactor_EV_Profiler(object):
+    """
+    Sampling thread created by
+    :meth:`Pyjo.Reactor.EV.Pyjo_Reactor_EV.enable_profiler`.
+    """
+
+    def __init__(self, interval=0.005, dispatching=None):
+        self.idle = 0
+        """::
+
+            count = profiler.idle
+
+        Number of samples taken while the reactor was waiting for events.
+        """
+
+        self.interval = interval
+        """::
+
+            interval = profiler.interval
+
+        Seconds between samples.
+        """
+
+        self.samples = {}
+        """::
+
+            count = profiler.samples['t3 app.refresh_cb;...;refresh_cb (app.py:30)']
+
+        Number of samples by collapsed stack.
+        """
+
+        self._busy = False
+        self._dispatching = dispatching
+        self._ident = None
+        self._names = {}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def clear(self):
+        """::
+
+            profiler.clear()
+
+        Remove all samples.
+        """
+        self.idle = 0
+        self.samples = {}
+
+    def collapsed(self):
+        """::
+
+            text = profiler.collapsed()
+
+        Return samples in collapsed stack format, most frequent stacks first.
+        """
+        stacks = sorted(self.samples.items(), key=lambda item: (-item[1], item[0]))
+        return ''.join('{0} {1}\n'.format(stack, count) for stack, count in stacks)
+
+    def dump(self, path):
+        """::
+
+            profiler.dump('reactor.collapsed')
+
+        Write samples in collapsed stack format to a file.
+        """
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample_loop, name='Pyjo.Reactor.EV.Profiler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _name(self, code):
+        # Frame names are formatted once for each code object
+        name = self._names.get(code)
+        if name is None:
+            name = self._names[code] = '{0} ({1}:{2})'.format(getattr(code, 'co_qualname', code.co_name), code.co_filename, code.co_firstlineno).replace(';', ':')
+        return name
+
+    def _sample(self):
+        if not self._busy:
+            self.idle += 1
+            return
+
+        frame = sys._current_frames().get(self._ident)
+        if frame is None:
+            return
+
+        key, cb = self._dispatching(frame) if self._dispatching is not None else (None, None)
+
+        codes = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+
+        if key is None:
+            tag = 'reactor'
+        elif isinstance(key, int):
+            tag = 'fd {0}'.format(key)
+        else:
+            tag = key
+        if cb is not None:
+            tag = '{0} {1}'.format(tag, describe(cb))
+
+        names = [tag.replace(';', ':')]
+        names.extend(self._name(code) for code in reversed(codes))
+        stack = ';'.join(names)
+        self.samples[stack] = self.samples.get(stack, 0) + 1
+
+    def _sample_loop(self):
+        while not self._stopped.wait(self.interval):
+            self._sample()
+
+
+new = Pyjo_Reactor_EV_Profiler
+object = Pyjo_Reactor_EV_Profiler
@@ -0,0 +1,190 @@
+"""
+Pyjo.Reactor.EV.Stats - Loop statistics for Pyjo.Reactor.EV
+============================================================
+::
+
+    import Pyjo.Reactor.EV
+
+    reactor = Pyjo.Reactor.EV.new()
+    stats = reactor.enable_stats()
+
+    def report_cb(reactor):
+        print(stats.as_dict())
+        stats.reset()
+
+    reactor.recurring(report_cb, 60)
+
+:mod:`Pyjo.Reactor.EV.Stats` holds counters collected by
+:meth:`Pyjo.Reactor.EV.Pyjo_Reactor_EV.enable_stats`.
+
+Loop iterations and time blocked waiting for events are measured with prepare
+and check watchers, which run just before and just after the backend waits.
+The rest of each iteration is spent in callbacks. Loop lag is measured with a
+probe timer. Durations of callbacks of handles, timers and other watchers are
+collected in histograms only while statistics are enabled, the reactor runs
+without any extra work otherwise.
+
+Classes
+-------
+"""
+
+
+class Histogram(object):
+    __slots__ = ('count', 'counts', 'max', 'total')
+
+    def __init__(self, size):
+        self.count = 0
+        self.counts = [0] * size
+        self.max = 0.0
+        self.total = 0.0
+
+
+class Pyjo_Reactor_EV_Stats(object):
+    """
+    Counters of a reactor, updated while the reactor runs.
+    """
+
+    bounds = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0)
+    """::
+
+        bounds = stats.bounds
+
+    Upper bounds in seconds of histogram buckets, durations above the last one
+    are counted in an extra bucket.
+    """
+
+    def __init__(self):
+        self.blocked = 0.0
+        """::
+
+            seconds = stats.blocked
+
+        Time spent waiting for events in the backend.
+        """
+
+        self.busy = 0.0
+        """::
+
+            seconds = stats.busy
+
+        Time spent in callbacks.
+        """
+
+        self.callbacks = {}
+        """::
+
+            histogram = stats.callbacks[fd]
+            histogram = stats.callbacks[tid]
+
+        Histograms of callback durations by file descriptor of handle, timer id
+        or watcher id, with ``count``, ``total``, ``max`` and ``counts`` of each
+        bucket of :attr:`bounds`.
+        """
+
+        self.iterations = 0
+        """::
+
+            iterations = stats.iterations
+
+        Number of loop iterations.
+        """
+
+        self.lag = 0.0
+        """::
+
+            seconds = stats.lag
+
+        How late the probe timer fired last time.
+        """
+
+        self.max_lag = 0.0
+        """::
+
+            seconds = stats.max_lag
+
+        Highest :attr:`lag` seen.
+        """
+
+        self.max_pending = 0
+        """::
+
+            events = stats.max_pending
+
+        Highest number of pending events in one iteration.
+        """
+
+        self.pending = 0
+        """::
+
+            events = stats.pending
+
+        Number of pending events of all iterations, divide by :attr:`iterations`
+        to get the average.
+        """
+
+    def as_dict(self):
+        """::
+
+            data = stats.as_dict()
+
+        Return counters as a dictionary which can be serialized to JSON, with
+        histograms as ``count``, ``total``, ``max`` and ``buckets`` values.
+        """
+        callbacks = {}
+        for key, histogram in self.callbacks.items():
+            callbacks[str(key)] = {
+                'count': histogram.count,
+                'total': histogram.total,
+                'max': histogram.max,
+                'buckets': list(histogram.counts),
+            }
+
+        return {
+            'iterations': self.iterations,
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'blocked': self.blocked,
+            'busy': self.busy,
+            'lag': self.lag,
+            'max_lag': self.max_lag,
+            'bounds': list(self.bounds),
+            'callbacks': callbacks,
+        }
+
+    def reset(self):
+        """::
+
+            stats.reset()
+
+        Reset all counters.
+        """
+        self.blocked = 0.0
+        self.busy = 0.0
+        self.callbacks = {}
+        self.iterations = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.max_pending = 0
+        self.pending = 0
+
+    def _dispatched(self, kind, key, start, end):
+        elapsed = end - start
+        histogram = self.callbacks.get(key)
+        if histogram is None:
+            histogram = self.callbacks[key] = Histogram(len(self.bounds) + 1)
+
+        histogram.count += 1
+        histogram.total += elapsed
+        if elapsed > histogram.max:
+            histogram.max = elapsed
+
+        i = 0
+        for bound in self.bounds:
+            if elapsed <= bound:
+                break
+            i += 1
+        histogram.counts[i] += 1
+
+
+new = Pyjo_Reactor_EV_Stats
+object = Pyjo_Reactor_EV_Stats
@@ -0,0 +1,153 @@
+"""
+Pyjo.Reactor.EV.Trace - Event trace of Pyjo.Reactor.EV
+======================================================
+::
+
+    import Pyjo.Reactor.EV
+
+    import signal
+
+    reactor = Pyjo.Reactor.EV.new()
+
+    # Dump trace of last 10 seconds on SIGUSR2
+    trace = reactor.enable_trace(signum=signal.SIGUSR2, seconds=10)
+
+    # Dump trace with API
+    trace.dump('trace.json')
+
+:mod:`Pyjo.Reactor.EV.Trace` records dispatches of a reactor in a ring buffer
+and exports them in Chrome Trace Event format, which can be opened in
+``chrome://tracing`` or Perfetto UI.
+
+Each I/O event, timer, run queue callback and watcher is recorded with start
+time, duration and file descriptor, timer id or watcher id, as well as
+changes of watched I/O events applied to libev watchers and errors caught in
+callbacks. The buffer is allocated upfront and keeps the last
+:attr:`Pyjo_Reactor_EV_Trace.size` events, recording one does not allocate
+anything but its timestamps.
+
+Classes
+-------
+"""
+
+import array
+import json
+import os
+
+
+class Pyjo_Reactor_EV_Trace(object):
+    """
+    Ring buffer of reactor events.
+    """
+
+    def __init__(self, size=65536):
+        self.size = size
+        """::
+
+            size = trace.size
+
+        Number of events kept.
+        """
+
+        self._count = 0
+        self._ends = array.array('d', [0.0]) * size
+        self._keys = [None] * size
+        self._kinds = [None] * size
+        self._starts = array.array('d', [0.0]) * size
+
+    def __len__(self):
+        return min(self._count, self.size)
+
+    def clear(self):
+        """::
+
+            trace.clear()
+
+        Remove all events.
+        """
+        self._count = 0
+        self._keys[:] = [None] * self.size
+        self._kinds[:] = [None] * self.size
+
+    def dump(self, path, seconds=None):
+        """::
+
+            trace.dump('trace.json')
+            trace.dump('trace.json', seconds=5)
+
+        Write events, or only those of the last given seconds, to a file in
+        Chrome Trace Event format.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(seconds), f)
+
+    def events(self, seconds=None):
+        """::
+
+            for kind, key, start, end in trace.events():
+                ...
+
+        Iterate over recorded events from the oldest one, or only those started
+        within the given seconds before the last one.
+        """
+        size = self.size
+        count = self._count
+        first = max(0, count - size)
+
+        since = None
+        if seconds is not None and count:
+            since = self._starts[(count - 1) % size] - seconds
+
+        for i in range(first, count):
+            i %= size
+            start = self._starts[i]
+            if since is None or start >= since:
+                yield self._kinds[i], self._keys[i], start, self._ends[i]
+
+    def record(self, kind, key, start, end):
+        """::
+
+            trace.record('timer', tid, start, end)
+
+        Record an event with start and end time in seconds.
+        """
+        i = self._count % self.size
+        self._count += 1
+        self._kinds[i] = kind
+        self._keys[i] = key
+        self._starts[i] = start
+        self._ends[i] = end
+
+    def to_dict(self, seconds=None):
+        """::
+
+            data = trace.to_dict()
+            data = trace.to_dict(seconds=5)
+
+        Return events as a dictionary in Chrome Trace Event format. Durations of
+        callbacks are complete events, errors are instant events.
+        """
+        pid = os.getpid()
+        events = []
+        for kind, key, start, end in self.events(seconds):
+            event = {
+                'name': kind if key is None else '{0} {1}'.format(kind, key),
+                'cat': kind,
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': pid,
+                'tid': pid,
+                'args': {'key': key},
+            }
+            if kind == 'error':
+                event['ph'] = 'i'
+                event['s'] = 't'
+                del event['dur']
+            events.append(event)
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+new = Pyjo_Reactor_EV_Trace
+object = Pyjo_Reactor_EV_Trace
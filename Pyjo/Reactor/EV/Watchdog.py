@@ -0,0 +1,159 @@
+"""
+Pyjo.Reactor.EV.Watchdog - Blocked loop watchdog for Pyjo.Reactor.EV
+====================================================================
+::
+
+    import Pyjo.Reactor.EV
+
+    reactor = Pyjo.Reactor.EV.new()
+    reactor.enable_watchdog(threshold=0.3)
+
+:mod:`Pyjo.Reactor.EV.Watchdog` is a thread watching a heartbeat of the
+reactor, which is updated by prepare and check watchers in each loop
+iteration. When a loop iteration keeps running callbacks for longer than
+:attr:`Pyjo_Reactor_EV_Watchdog.threshold` seconds, the watchdog reports the
+Python stack of the reactor thread, found with :func:`sys._current_frames`,
+and the file descriptor, timer id or watcher id whose callback is running.
+Each stall is reported once. ::
+
+    Pyjo.Reactor.EV blocked for 0.312s in callback of t42 (app.refresh_cb)
+      File "app.py", line 10, in refresh_cb
+        time.sleep(1)
+
+Time spent waiting for events is not a stall. Note that the watchdog thread
+can only run when the reactor thread releases the GIL, which happens at least
+every :func:`sys.getswitchinterval` seconds in Python code.
+
+Classes
+-------
+"""
+
+from Pyjo.Util import steady_time
+
+import sys
+import threading
+import traceback
+
+
+class Pyjo_Reactor_EV_Watchdog(object):
+    """
+    Watchdog thread created by
+    :meth:`Pyjo.Reactor.EV.Pyjo_Reactor_EV.enable_watchdog`.
+    """
+
+    def __init__(self, threshold, cb=None, dispatching=None):
+        self.cb = cb if cb is not None else report
+        """::
+
+            cb = watchdog.cb
+
+        Callback invoked from the watchdog thread with the watchdog, seconds the
+        reactor is blocked for, the id and the callback being dispatched, which
+        are ``None`` if unknown, and the formatted stack. Defaults to
+        :func:`report`.
+        """
+
+        self.stalls = 0
+        """::
+
+            stalls = watchdog.stalls
+
+        Number of reported stalls.
+        """
+
+        self.threshold = threshold
+        """::
+
+            threshold = watchdog.threshold
+
+        Seconds the reactor may keep running callbacks before a stall is
+        reported.
+        """
+
+        self._busy_since = None
+        self._dispatching = dispatching
+        self._ident = None
+        self._reported = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._watch, name='Pyjo.Reactor.EV.Watchdog')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _check(self):
+        since = self._busy_since
+        if since is None or since == self._reported:
+            return
+
+        elapsed = steady_time() - since
+        if elapsed < self.threshold:
+            return
+
+        frame = sys._current_frames().get(self._ident)
+        if frame is None:
+            return
+
+        # Iteration might have finished meanwhile
+        if since != self._busy_since:
+            return
+
+        key, cb = self._dispatching(frame) if self._dispatching is not None else (None, None)
+        stack = ''.join(traceback.format_stack(frame))
+        frame = None
+
+        self._reported = since
+        self.stalls += 1
+        self.cb(self, elapsed, key, cb, stack)
+
+    def _watch(self):
+        interval = self.threshold / 4
+        while not self._stopped.wait(interval):
+            self._check()
+
+
+def describe(cb):
+    """::
+
+        name = Pyjo.Reactor.EV.Watchdog.describe(cb)
+
+    Return module and qualified name of a callback.
+    """
+    # Tasks are named by their coroutines
+    coro = getattr(getattr(cb, '__self__', None), '_coro', None)
+    if coro is not None:
+        cb = coro
+
+    name = getattr(cb, '__qualname__', None) or getattr(cb, '__name__', None)
+    if name is None:
+        return repr(cb)
+
+    module = getattr(cb, '__module__', None)
+    return '{0}.{1}'.format(module, name) if module else name
+
+
+def report(watchdog, elapsed, key, cb, stack):
+    """::
+
+        Pyjo.Reactor.EV.Watchdog.report(watchdog, elapsed, key, cb, stack)
+
+    Default callback which prints the stall to ``stderr``.
+    """
+    where = ''
+    if key is not None:
+        where += ' in callback of {0}'.format(key)
+    if cb is not None:
+        where += ' ({0})'.format(describe(cb))
+
+    sys.stderr.write('Pyjo.Reactor.EV blocked for {0:.3f}s{1}\n{2}'.format(elapsed, where, stack))
+    sys.stderr.flush()
+
+
+new = Pyjo_Reactor_EV_Watchdog
+object = Pyjo_Reactor_EV_Watchdog
@@ -0,0 +1,1941 @@
+"""
+Pyjo.Reactor.EV - Low-level event reactor with pyev support
+===========================================================
+::
+
+    import Pyjo.Reactor.EV
+
+    # Watch if handle becomes readable or writable
+    reactor = Pyjo.Reactor.EV.new()
+
+    def io_cb(reactor, writable):
+        if writable:
+            print('Handle is writable')
+        else:
+            print('Handle is readable')
+
+    reactor.io(io_cb, handle)
+
+    # Change to watching only if handle becomes writable
+    reactor.watch(handle, read=False, write=True)
+
+    # Add a timer
+    def timer_cb(reactor):
+        reactor.remove(handle)
+        print('Timeout!')
+
+    reactor.timer(timer_cb, 15)
+
+    # Start reactor if necessary
+    if not reactor.is_running:
+        reactor.start()
+
+:mod:`Pyjo.Reactor.EV` is a low-level event reactor based on :mod:`pyev`.
+
+:mod:`Pyjo.Reactor.EV` will be used as the default backend for
+:mod:`Pyjo.IOLoop` if it is loaded before any module using the loop or if
+the ``PYJO_REACTOR`` environment variable is set to ``Pyjo.Reactor.EV`` value.
+
+Debugging
+---------
+
+You can set the ``PYJO_REACTOR_DEBUG`` environment variable to get some
+advanced diagnostics information printed to ``stderr``. ::
+
+    PYJO_REACTOR_DEBUG=1
+
+You can set the ``PYJO_REACTOR_DIE`` environment variable to make reactor die if task
+dies with exception. ::
+
+    PYJO_REACTOR_DIE=1
+
+Backend
+-------
+
+You can set the ``PYJO_REACTOR_EV_BACKEND`` environment variable to choose the
+libev backend used by new reactors. It accepts a comma separated list of backend
+names in order of preference (``select``, ``poll``, ``epoll``, ``kqueue``,
+``devpoll``, ``port``, ``linuxaio``, ``iouring``). ::
+
+    PYJO_REACTOR_EV_BACKEND=epoll
+
+You can set the ``PYJO_REACTOR_EV_FLAGS`` environment variable to pass
+additional loop flags (``noenv``, ``forkcheck``, ``noinotify``, ``signalfd``,
+``nosigmask``, ``notimerfd``). ::
+
+    PYJO_REACTOR_EV_FLAGS=signalfd,noinotify
+
+Both can be overridden with ``backend`` and ``flags`` arguments of the
+constructor.
+
+Timers
+------
+
+You can set the ``PYJO_REACTOR_EV_TIMER_RESOLUTION`` environment variable or
+``timer_resolution`` argument of the constructor to drive all timers of at
+least that many seconds from a single libev timer with a timing wheel. Such
+timers fire up to one resolution late, but restarting them with
+:meth:`Pyjo_Reactor_EV.again` costs only an assignment, which suits large
+numbers of connection timeouts. ::
+
+    reactor = Pyjo.Reactor.EV.new(timer_resolution=0.5)
+
+Run queue
+---------
+
+Timers with zero delay, recurring timers with zero interval and
+:meth:`Pyjo_Reactor_EV.next_tick` callbacks do not use libev timers. They are
+kept in a run queue which is processed once per loop iteration, just after the
+reactor stopped waiting and before I/O events of that iteration are handled,
+and at most :attr:`Pyjo_Reactor_EV.tick_budget` of them are invoked in one
+iteration, so CPU bound background work shares the loop fairly with sockets.
+Callbacks queued by I/O callbacks run in the next iteration. The reactor does
+not wait for new events while the queue is not empty.
+
+Priorities
+----------
+
+Handles and timers can have a priority from ``-2`` to ``2``, ``0`` by default.
+Events with higher priority are handled first in each loop iteration, so
+admin sockets can be served ahead of bulk client traffic and housekeeping
+timers can run after I/O. ::
+
+    reactor.io(admin_cb, admin_handle, priority=2)
+    reactor.recurring(housekeeping_cb, 10, priority=-2)
+
+Priority is ignored for zero delay timers and timers driven by the timing wheel.
+
+Threads
+-------
+
+Callbacks can be passed from other threads with
+:meth:`Pyjo_Reactor_EV.call_soon_threadsafe` and blocking functions can be
+offloaded to a pool of :attr:`Pyjo_Reactor_EV.threads` threads with
+:meth:`Pyjo_Reactor_EV.run_in_thread`. All callbacks queued before the reactor
+wakes up are invoked in one batch.
+
+Statistics
+----------
+
+Loop iterations, time blocked waiting for events, loop lag and durations of
+callbacks can be collected with :meth:`Pyjo_Reactor_EV.enable_stats`. See
+:mod:`Pyjo.Reactor.EV.Stats`.
+
+Watchdog
+--------
+
+A thread reporting callbacks which block the reactor, with the stack of the
+reactor thread, can be started with :meth:`Pyjo_Reactor_EV.enable_watchdog`.
+See :mod:`Pyjo.Reactor.EV.Watchdog`.
+
+Profiling
+---------
+
+A thread sampling stacks of the reactor thread, tagged with the callback
+running at that moment, can be started with
+:meth:`Pyjo_Reactor_EV.enable_profiler`. Samples are collected in collapsed
+stack format for flame graphs. See :mod:`Pyjo.Reactor.EV.Profiler`.
+
+Tracing
+-------
+
+Dispatches of the reactor can be recorded in a ring buffer and exported in
+Chrome Trace Event format with :meth:`Pyjo_Reactor_EV.enable_trace`. See
+:mod:`Pyjo.Reactor.EV.Trace`.
+
+Tasks
+-----
+
+Coroutines can be run as tasks with :meth:`Pyjo_Reactor_EV.spawn` and wait for
+timers and handles with :meth:`Pyjo_Reactor_EV.sleep`,
+:meth:`Pyjo_Reactor_EV.readable` and :meth:`Pyjo_Reactor_EV.writable`. See
+:mod:`Pyjo.Reactor.EV.Future`. ::
+
+    async def client(sock):
+        await reactor.writable(sock)
+        sock.send(b'ping')
+        await reactor.readable(sock)
+        print(sock.recv(4))
+
+    reactor.spawn(client(sock))
+
+Events
+------
+
+:mod:`Pyjo.Reactor.EV` inherits all events from :mod:`Pyjo.Reactor.Select`.
+
+Classes
+-------
+"""
+
+import Pyjo.Reactor.EV.Future
+import Pyjo.Reactor.EV.Profiler
+import Pyjo.Reactor.EV.Stats
+import Pyjo.Reactor.EV.Trace
+import Pyjo.Reactor.EV.Watchdog
+import Pyjo.Reactor.Select
+
+import collections
+import errno
+import itertools
+import math
+import os
+import pyev
+import socket
+import threading
+import time
+import weakref
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    from threading import get_ident
+except ImportError:
+    from thread import get_ident
+
+from Pyjo.Util import getenv, setenv, steady_time
+
+
+setenv('PYJO_REACTOR', getenv('PYJO_REACTOR', 'Pyjo.Reactor.EV'))
+
+BACKEND = getenv('PYJO_REACTOR_EV_BACKEND', '')
+FLAGS = getenv('PYJO_REACTOR_EV_FLAGS', '')
+TIMER_RESOLUTION = float(getenv('PYJO_REACTOR_EV_TIMER_RESOLUTION', 0))
+
+NONBLOCKING = (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR)
+
+IOV_MAX = 1024
+
+BACKENDS = (
+    ('select', getattr(pyev, 'EVBACKEND_SELECT', 0x00000001)),
+    ('poll', getattr(pyev, 'EVBACKEND_POLL', 0x00000002)),
+    ('epoll', getattr(pyev, 'EVBACKEND_EPOLL', 0x00000004)),
+    ('kqueue', getattr(pyev, 'EVBACKEND_KQUEUE', 0x00000008)),
+    ('devpoll', getattr(pyev, 'EVBACKEND_DEVPOLL', 0x00000010)),
+    ('port', getattr(pyev, 'EVBACKEND_PORT', 0x00000020)),
+    ('linuxaio', getattr(pyev, 'EVBACKEND_LINUXAIO', 0x00000040)),
+    ('iouring', getattr(pyev, 'EVBACKEND_IOURING', 0x00000080)),
+)
+
+LOOP_FLAGS = (
+    ('noinotify', getattr(pyev, 'EVFLAG_NOINOTIFY', 0x00100000)),
+    ('signalfd', getattr(pyev, 'EVFLAG_SIGNALFD', 0x00200000)),
+    ('nosigmask', getattr(pyev, 'EVFLAG_NOSIGMASK', 0x00400000)),
+    ('notimerfd', getattr(pyev, 'EVFLAG_NOTIMERFD', 0x00800000)),
+    ('noenv', getattr(pyev, 'EVFLAG_NOENV', 0x01000000)),
+    ('forkcheck', getattr(pyev, 'EVFLAG_FORKCHECK', 0x02000000)),
+)
+
+
+class IoRecord(object):
+    """
+    Registered handle. The record is stored in the ``data`` slot of its watcher.
+    """
+    __slots__ = ('cb', 'changed', 'combined', 'fd', 'mode', 'priority', 'queue', 'watcher')
+
+    def __init__(self, cb, fd, combined=False):
+        self.cb = cb
+        self.changed = False
+        self.combined = combined
+        self.fd = fd
+        self.mode = 0
+        self.priority = 0
+        self.queue = None
+        self.watcher = None
+
+
+class WriteQueue(object):
+    """
+    Buffers waiting to be written to a handle by :meth:`Pyjo_Reactor_EV.write`.
+    """
+    __slots__ = ('armed', 'buffers', 'callbacks', 'handle', 'scheduled')
+
+    def __init__(self, handle):
+        self.armed = False
+        self.buffers = collections.deque()
+        self.callbacks = []
+        self.handle = handle
+        self.scheduled = False
+
+
+class FileSpan(object):
+    """
+    Part of file waiting to be sent to a handle by
+    :meth:`Pyjo_Reactor_EV.sendfile`.
+    """
+    __slots__ = ('cb', 'count', 'fd', 'offset', 'sent')
+
+    def __init__(self, fd, offset, count, cb):
+        self.cb = cb
+        self.count = count
+        self.fd = fd
+        self.offset = offset
+        self.sent = 0
+
+
+class TimerRecord(object):
+    """
+    Registered timer. The record is stored in the ``data`` slot of its watcher.
+    """
+    __slots__ = ('after', 'cb', 'deadline', 'recurring', 'slot', 'tid', 'watcher')
+
+    def __init__(self, cb, tid, recurring, after):
+        self.after = after
+        self.cb = cb
+        self.deadline = None
+        self.recurring = recurring
+        self.slot = None
+        self.tid = tid
+        self.watcher = None
+
+
+class WatcherRecord(object):
+    """
+    Registered periodic, signal, prepare, check or idle watcher. The record is stored in the
+    ``data`` slot of its watcher.
+    """
+    __slots__ = ('args', 'cb', 'event', 'wid', 'watcher')
+
+    def __init__(self, cb, wid, event, args):
+        self.args = args
+        self.cb = cb
+        self.event = event
+        self.wid = wid
+        self.watcher = None
+
+
+class TimerWheel(object):
+    """
+    Hashed timing wheel which drives many coarse timers from a single libev
+    timer. Restarted timers are moved to their new slot lazily, when their old
+    slot comes up. Deadlines use the monotonic clock, libev time follows the
+    wall clock and steps with it.
+    """
+
+    def __init__(self, loop, resolution, callback, size=512):
+        self.count = 0
+        self.loop = loop
+        self.resolution = resolution
+        self.slots = [set() for i in range(size)]
+        self.tick = 0
+        self.watcher = loop.timer(resolution, resolution, callback)
+
+    def add(self, timer):
+        now = steady_time()
+        timer.deadline = now + timer.after
+        if not self.count:
+            # Ticks of the watcher are aligned with slot boundaries
+            self.tick = int(now / self.resolution)
+            self.watcher.set((self.tick + 1) * self.resolution - now, self.resolution)
+            self.watcher.start()
+        self.count += 1
+        self._insert(timer)
+
+    def again(self, timer):
+        if timer.slot is None:
+            self.add(timer)
+        else:
+            timer.deadline = steady_time() + timer.after
+
+    def clear(self):
+        for slot in self.slots:
+            for timer in slot:
+                timer.slot = None
+            slot.clear()
+        self.count = 0
+        self.watcher.stop()
+
+    def expire(self):
+        now = steady_time()
+        size = len(self.slots)
+        tick = self.tick
+        self.tick = int(now / self.resolution)
+
+        expired = []
+        for t in range(tick + 1, min(self.tick, tick + size) + 1):
+            slot = self.slots[t % size]
+            if not slot:
+                continue
+            self.slots[t % size] = set()
+            for timer in slot:
+                if timer.deadline <= now:
+                    timer.slot = None
+                    expired.append(timer)
+                else:
+                    self._insert(timer)
+
+        self.count -= len(expired)
+        if not self.count:
+            self.watcher.stop()
+
+        return expired
+
+    def remove(self, timer):
+        if timer.slot is None:
+            return
+        self.slots[timer.slot].discard(timer)
+        timer.slot = None
+        self.count -= 1
+        if not self.count:
+            self.watcher.stop()
+
+    def _insert(self, timer):
+        tick = max(int(math.ceil(timer.deadline / self.resolution)), self.tick + 1)
+        timer.slot = tick % len(self.slots)
+        self.slots[timer.slot].add(timer)
+
+
+class Pyjo_Reactor_EV(Pyjo.Reactor.Select.object):
+    """
+    :mod:`Pyjo.Reactor.EV` inherits all attributes and methods from
+    :mod:`Pyjo.Reactor.Select` and implements the following new ones.
+    """
+
+    threads = 4
+    """::
+
+        threads = reactor.threads
+        reactor.threads = 8
+
+    Maximum number of threads used by :meth:`run_in_thread`, defaults to ``4``.
+    """
+
+    tick_budget = 100
+    """::
+
+        budget = reactor.tick_budget
+        reactor.tick_budget = 1000
+
+    Maximum number of callbacks from the run queue invoked in one loop
+    iteration, defaults to ``100``.
+    """
+
+    _busy = 0
+    _jobs = None
+    _loop = None
+    _probes = ()
+    _profiler = None
+    _stats = None
+    _trace = None
+    _watchdog = None
+    _wheel = None
+
+    def __init__(self, **kwargs):
+        flags = _mask(kwargs.pop('backend', BACKEND), BACKENDS) | _mask(kwargs.pop('flags', FLAGS), LOOP_FLAGS)
+        timer_resolution = kwargs.pop('timer_resolution', TIMER_RESOLUTION)
+
+        super(Pyjo_Reactor_EV, self).__init__(**kwargs)
+
+        self._loop = pyev.Loop(flags)
+
+        # Signals and other watchers
+        self._watchers = {}
+        self._wids = itertools.count(1)
+
+        # Callbacks from other threads and thread pool
+        self._pending = collections.deque()
+        self._workers = []
+
+        # Receive buffers shared by readers, by size
+        self._buffers = {}
+
+        # Zero delay timers, processed once per loop iteration
+        self._soon = collections.deque()
+
+        # Prepare callbacks of hooks, also invoked when the loop returns
+        self._exits = {}
+
+        # Watchers resolving futures, and stopped ones kept for reuse
+        self._resolving = set()
+        self._spare_ios = []
+        self._spare_timers = []
+
+        # Handles with changed I/O events and handles with new data to write,
+        # both processed once per loop iteration
+        self._changes = []
+        self._flushes = []
+        self._watch_stats = {'requested': 0, 'skipped': 0, 'coalesced': 0, 'applied': 0}
+
+        # All watchers share the same callbacks and find their records in
+        # the data slot. Watchers are stopped by reset, remove and when the
+        # reactor is gone. Liveness is checked explicitly, so a ReferenceError
+        # raised by a dead proxy in user code is not mistaken for the reactor
+        # being gone.
+        reactor = weakref.ref(self)
+
+        def io_cb(watcher, revents):
+            r = reactor()
+            if r is None:
+                watcher.stop()
+                return
+            r._io(watcher, revents)
+
+        def timer_cb(watcher, revents):
+            r = reactor()
+            if r is None:
+                watcher.stop()
+                return
+            r._timeout(watcher, revents)
+
+        def prepare_cb(watcher, revents):
+            r = reactor()
+            if r is None:
+                watcher.stop()
+                return
+            r._apply_changes()
+
+        def watcher_cb(watcher, revents):
+            r = reactor()
+            if r is None:
+                watcher.stop()
+                return
+            r._notify(watcher, revents)
+
+        def soon_cb(watcher, revents):
+            r = reactor()
+            if r is None:
+                watcher.stop()
+                return
+            r._run_soon()
+
+        def idle_cb(watcher, revents):
+            pass
+
+        def async_cb(watcher, revents):
+            r = reactor()
+            if r is None:
+                watcher.stop()
+                return
+            r._drain()
+
+        def wheel_cb(watcher, revents):
+            r = reactor()
+            if r is None:
+                watcher.stop()
+                return
+            r._expire()
+
+        def future_cb(watcher, revents):
+            r = reactor()
+            if r is None:
+                watcher.stop()
+                return
+            r._resolve(watcher, revents)
+
+        self._future_cb = future_cb
+        self._io_cb = io_cb
+        self._timer_cb = timer_cb
+        self._watcher_cb = watcher_cb
+        self._prepare = self._loop.prepare(prepare_cb)
+
+        # Idle watcher only keeps the loop from waiting while queue is not empty
+        self._soon_check = self._loop.check(soon_cb)
+        self._soon_idle = self._loop.idle(idle_cb)
+
+        if timer_resolution:
+            self._wheel = TimerWheel(self._loop, timer_resolution, wheel_cb)
+
+        # Does not keep the loop running on its own
+        self._async = pyev.Async(self._loop, async_cb)
+        self._async.start()
+        self._loop.unref()
+
+    def __del__(self):
+        if self._loop is not None:
+            if self._profiler is not None:
+                self.disable_profiler()
+            if self._stats is not None:
+                self.disable_stats()
+            if self._trace is not None:
+                self.disable_trace()
+            if self._watchdog is not None:
+                self.disable_watchdog()
+            self._stop_watchers()
+            self._stop_threads()
+
+    def acceptor(self, sock, cb, max_per_tick=64, nodelay=True):
+        """::
+
+            reactor = reactor.acceptor(sock, cb)
+            reactor = reactor.acceptor(sock, cb, max_per_tick=16, nodelay=False)
+
+        Watch listening socket and accept up to ``max_per_tick`` connections each
+        time it becomes readable, invoking the callback once with the list of
+        ``(socket, address)`` pairs. Accepted sockets are non-blocking and have
+        ``TCP_NODELAY`` option enabled for TCP connections. The cap keeps accept
+        storms from starving established connections. Remove the socket with
+        :meth:`remove`. ::
+
+            def accept_cb(reactor, connections):
+                for sock, address in connections:
+                    reactor.io(io_cb, sock)
+
+            reactor.acceptor(sock, accept_cb)
+        """
+        sock.setblocking(False)
+
+        def accept_cb(reactor, writable):
+            connections = []
+            err = None
+
+            for i in range(max_per_tick):
+                try:
+                    conn, address = sock.accept()
+                except socket.error as e:
+                    if e.args[0] == errno.ECONNABORTED:
+                        continue
+                    if e.args[0] not in NONBLOCKING:
+                        err = e
+                    break
+
+                conn.setblocking(False)
+                if nodelay and conn.family != getattr(socket, 'AF_UNIX', None):
+                    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                connections.append((conn, address))
+
+            if connections:
+                cb(reactor, connections)
+
+            if err is not None:
+                raise err
+
+        return self.io(accept_cb, sock).watch(sock, True, False)
+
+    def after_fork(self):
+        """::
+
+            reactor.after_fork()
+
+        Reinitialise the reactor in a child process, so the kernel state of the
+        backend (like the ``epoll`` set) is recreated on next loop iteration
+        instead of being shared with the parent process. Threads do not survive
+        ``fork``, so jobs of :meth:`run_in_thread` which have not finished are
+        dropped without invoking their callbacks. Reactors created after
+        ``fork`` do not need this. ::
+
+            if not os.fork():
+                reactor.after_fork()
+                reactor.start()
+        """
+        self._loop.reset()
+
+        # Finished jobs are still invoked from the pending queue
+        finished = sum(1 for cb, args in self._pending if cb is _done)
+        for i in range(self._busy - finished):
+            self._loop.unref()
+        self._busy = finished
+        self._jobs = None
+        self._workers = []
+
+    def again(self, tid):
+        """::
+
+            reactor.again(tid)
+
+        Restart active timer.
+        """
+        timer = self._timers[tid]
+        if timer.watcher is not None:
+            timer.watcher.reset()
+        elif self._wheel is not None and timer.after:
+            self._wheel.again(timer)
+
+    @property
+    def backend(self):
+        """::
+
+            name = reactor.backend
+
+        Name of libev backend used by the loop, ie. ``epoll``. ::
+
+            reactor = Pyjo.Reactor.EV.new(backend='epoll,poll', flags='signalfd')
+        """
+        backend = self._loop.backend
+        for name, value in BACKENDS:
+            if backend == value:
+                return name
+        return str(backend)
+
+    def call_soon_threadsafe(self, cb, *args):
+        """::
+
+            reactor.call_soon_threadsafe(cb, 'foo', 'bar')
+
+        Invoke the callback with given arguments from the reactor thread as soon
+        as possible. This is the only method which can be safely called from
+        other threads. ::
+
+            def done_cb(reactor, result):
+                print(result)
+
+            reactor.call_soon_threadsafe(done_cb, 42)
+        """
+        self._pending.append((cb, args))
+        self._async.send()
+
+    def check(self, cb):
+        """::
+
+            wid = reactor.check(cb)
+
+        Invoke the callback once per loop iteration, just after the reactor
+        stopped waiting for new events and before any of them are handled.
+        Note that an active check watcher keeps the reactor running until it is
+        removed. ::
+
+            def check_cb(reactor):
+                logger.flush()
+
+            reactor.check(check_cb)
+        """
+        return self._watcher(cb, 'Check', (), self._loop.check)
+
+    def disable_profiler(self):
+        """::
+
+            profiler = reactor.disable_profiler()
+
+        Stop the profiler thread and return the
+        :class:`Pyjo.Reactor.EV.Profiler.Pyjo_Reactor_EV_Profiler` object with
+        collected samples, or ``None`` if the profiler was not enabled.
+        """
+        profiler = self._profiler
+        if profiler is None:
+            return None
+
+        self._unhook(self._profiler_watchers)
+        self._profiler_watchers = None
+        profiler.stop()
+
+        self._profiler = None
+        return profiler
+
+    def disable_stats(self):
+        """::
+
+            stats = reactor.disable_stats()
+
+        Stop collecting statistics and return the final
+        :class:`Pyjo.Reactor.EV.Stats.Pyjo_Reactor_EV_Stats` object, or ``None``
+        if statistics were not enabled.
+        """
+        stats = self._stats
+        if stats is None:
+            return None
+
+        self._unhook(self._stats_watchers)
+        self._stats_watchers = None
+        self._unprobe(stats._dispatched)
+
+        self._stats = None
+        return stats
+
+    def disable_trace(self):
+        """::
+
+            trace = reactor.disable_trace()
+
+        Stop recording events and return the
+        :class:`Pyjo.Reactor.EV.Trace.Pyjo_Reactor_EV_Trace` object, or ``None``
+        if tracing was not enabled.
+        """
+        trace = self._trace
+        if trace is None:
+            return None
+
+        self._unhook(self._trace_watchers)
+        self._trace_watchers = None
+        self._unprobe(trace.record)
+        for name in '_apply_changes', 'emit':
+            del self.__dict__[name]
+
+        self._trace = None
+        return trace
+
+    def disable_watchdog(self):
+        """::
+
+            watchdog = reactor.disable_watchdog()
+
+        Stop the watchdog thread and return the
+        :class:`Pyjo.Reactor.EV.Watchdog.Pyjo_Reactor_EV_Watchdog` object, or
+        ``None`` if the watchdog was not enabled.
+        """
+        watchdog = self._watchdog
+        if watchdog is None:
+            return None
+
+        self._unhook(self._watchdog_watchers)
+        self._watchdog_watchers = None
+        watchdog.stop()
+
+        self._watchdog = None
+        return watchdog
+
+    def enable_profiler(self, interval=0.005):
+        """::
+
+            profiler = reactor.enable_profiler()
+            profiler = reactor.enable_profiler(interval=0.001)
+
+        Start a :class:`Pyjo.Reactor.EV.Profiler.Pyjo_Reactor_EV_Profiler`
+        thread taking a sample of the stack of the reactor thread every
+        ``interval`` seconds while the reactor is not waiting for events. Each
+        sample is tagged with the file descriptor, timer id or watcher id and
+        the name of the callback running at that moment, and counted in
+        collapsed stack format. ::
+
+            profiler = reactor.enable_profiler()
+            reactor.start()
+            reactor.disable_profiler().dump('reactor.collapsed')
+        """
+        if self._profiler is not None:
+            return self._profiler
+
+        profiler = self._profiler = Pyjo.Reactor.EV.Profiler.new(interval, _dispatching)
+
+        def prepare_cb(watcher, revents):
+            profiler._busy = False
+
+        def check_cb(watcher, revents):
+            profiler._ident = get_ident()
+            profiler._busy = True
+
+        self._profiler_watchers = self._hook(prepare_cb, check_cb)
+        profiler.start()
+
+        return profiler
+
+    def enable_stats(self, lag_interval=0.1):
+        """::
+
+            stats = reactor.enable_stats()
+            stats = reactor.enable_stats(lag_interval=1)
+
+        Start collecting statistics of the reactor in a
+        :class:`Pyjo.Reactor.EV.Stats.Pyjo_Reactor_EV_Stats` object: loop
+        iterations, pending events, time blocked in the backend and spent in
+        callbacks, loop lag measured by a timer every ``lag_interval`` seconds
+        and histograms of callback durations by file descriptor, timer id or
+        watcher id. Watchers used for statistics do not keep the reactor
+        running. Until enabled, statistics cost nothing. ::
+
+            stats = reactor.enable_stats()
+            reactor.start()
+            print(stats.busy / (stats.busy + stats.blocked))
+        """
+        if self._stats is not None:
+            return self._stats
+
+        stats = self._stats = Pyjo.Reactor.EV.Stats.new()
+        loop = self._loop
+        marks = [None, None, steady_time() + lag_interval]
+
+        def prepare_cb(watcher, revents):
+            now = marks[0] = steady_time()
+            if marks[1] is not None:
+                stats.busy += now - marks[1]
+
+            # Time until next run of the loop is neither busy nor blocked
+            if not revents:
+                marks[0] = marks[1] = None
+
+        def check_cb(watcher, revents):
+            now = marks[1] = steady_time()
+            if marks[0] is not None:
+                stats.blocked += now - marks[0]
+            stats.iterations += 1
+            pending = loop.pending
+            stats.pending += pending
+            if pending > stats.max_pending:
+                stats.max_pending = pending
+
+        # Late timers are rescheduled from current time by libev
+        def lag_cb(watcher, revents):
+            now = steady_time()
+            lag = stats.lag = max(0.0, now - marks[2])
+            if lag > stats.max_lag:
+                stats.max_lag = lag
+            marks[2] = max(marks[2] + lag_interval, now)
+
+        self._stats_watchers = self._hook(prepare_cb, check_cb, loop.timer(lag_interval, lag_interval, lag_cb))
+
+        self._probe(stats._dispatched)
+
+        return stats
+
+    def enable_trace(self, size=65536, signum=None, path='pyjo-trace-{pid}-{time}.json', seconds=None):
+        """::
+
+            trace = reactor.enable_trace()
+            trace = reactor.enable_trace(size=1000000)
+            trace = reactor.enable_trace(signum=signal.SIGUSR2, seconds=10)
+
+        Start recording the last ``size`` events of the reactor in a
+        :class:`Pyjo.Reactor.EV.Trace.Pyjo_Reactor_EV_Trace` ring buffer: I/O
+        events, timers, run queue callbacks and watchers with their durations,
+        changes of I/O events applied to libev watchers and errors caught in
+        callbacks. With ``signum`` the trace of the last ``seconds``, or the whole
+        buffer, is written to ``path`` in Chrome Trace Event format each time
+        the signal is delivered, ``{pid}`` and ``{time}`` in the path are
+        replaced with process id and current time. ::
+
+            trace = reactor.enable_trace()
+            reactor.start()
+            trace.dump('trace.json')
+        """
+        if self._trace is not None:
+            return self._trace
+
+        trace = self._trace = Pyjo.Reactor.EV.Trace.new(size)
+        self._probe(trace.record)
+
+        reactor = weakref.ref(self)
+        cls = type(self)
+        watch_stats = self._watch_stats
+
+        def apply_changes():
+            t0 = steady_time()
+            applied = watch_stats['applied']
+            cls._apply_changes(reactor())
+            trace.record('watch', watch_stats['applied'] - applied, t0, steady_time())
+
+        def emit(name, *args):
+            if name == 'error':
+                now = steady_time()
+                trace.record('error', '{0}: {1!r}'.format(args[1] if len(args) > 1 else None, args[0]), now, now)
+            return cls.emit(reactor(), name, *args)
+
+        self._apply_changes = apply_changes
+        self.emit = emit
+
+        def dump_cb(watcher, revents):
+            trace.dump(path.format(pid=os.getpid(), time=int(time.time())), seconds)
+
+        if signum is None:
+            self._trace_watchers = ()
+        else:
+            self._trace_watchers = self._hook(None, None, self._loop.signal(signum, dump_cb))
+
+        return trace
+
+    def enable_watchdog(self, threshold=0.3, cb=None):
+        """::
+
+            watchdog = reactor.enable_watchdog()
+            watchdog = reactor.enable_watchdog(threshold=0.1, cb=stall_cb)
+
+        Start a :class:`Pyjo.Reactor.EV.Watchdog.Pyjo_Reactor_EV_Watchdog`
+        thread reporting loop iterations which keep running callbacks for more
+        than ``threshold`` seconds, with the stack of the reactor thread and the
+        file descriptor, timer id or watcher id whose callback is running.
+        Stalls are printed to ``stderr`` unless a callback is given, which is
+        invoked from the watchdog thread. ::
+
+            def stall_cb(watchdog, elapsed, key, cb, stack):
+                log.warning('Blocked for %.3fs by %s:\n%s', elapsed, key, stack)
+        """
+        if self._watchdog is not None:
+            return self._watchdog
+
+        watchdog = self._watchdog = Pyjo.Reactor.EV.Watchdog.new(threshold, cb, _dispatching)
+
+        def prepare_cb(watcher, revents):
+            watchdog._busy_since = None
+
+        def check_cb(watcher, revents):
+            watchdog._ident = get_ident()
+            watchdog._busy_since = steady_time()
+
+        self._watchdog_watchers = self._hook(prepare_cb, check_cb)
+        watchdog.start()
+
+        return watchdog
+
+    def idle(self, cb):
+        """::
+
+            wid = reactor.idle(cb)
+
+        Invoke the callback once per loop iteration when there are no other
+        pending events. The reactor does not wait for new events while an idle
+        watcher is active.
+        """
+        return self._watcher(cb, 'Idle', (), self._loop.idle)
+
+    def io(self, cb, handle, combined=False, priority=None):
+        """::
+
+            reactor = reactor.io(cb, handle)
+            reactor = reactor.io(cb, handle, combined=True)
+            reactor = reactor.io(cb, handle, priority=1)
+
+        Watch handle for I/O events, invoking the callback whenever handle becomes
+        readable or writable.
+
+        With ``combined`` option the callback is invoked only once for each
+        wakeup, even if handle is readable and writable at the same time. ::
+
+            def io_cb(reactor, readable, writable):
+                if readable:
+                    print('Handle is readable')
+                if writable:
+                    print('Handle is writable')
+
+            reactor.io(io_cb, handle, combined=True)
+
+        Priority of a handle which is watched already is kept unless
+        ``priority`` option is given, new handles default to ``0``.
+        """
+        fd = handle.fileno()
+
+        io = self._ios.get(fd)
+        if io is None:
+            self._ios[fd] = IoRecord(cb, fd, combined)
+        else:
+            io.cb = cb
+            io.combined = combined
+
+        return self.watch(handle, True, True, priority)
+
+    @property
+    def is_running(self):
+        """::
+
+            boolean = reactor.is_running
+
+        Check if reactor is running.
+        """
+        return self._loop.depth
+
+    def one_tick(self):
+        """::
+
+            reactor.one_tick()
+
+        Run reactor until an event occurs. Note that this method can recurse back into
+        the reactor, so you need to be careful. Meant to be overloaded in a subclass.
+        """
+        self._run(pyev.EVRUN_ONCE)
+
+    def periodic(self, cb, offset, interval=0, reschedule=None):
+        """::
+
+            wid = reactor.periodic(cb, 0, 60)
+            wid = reactor.periodic(cb, 0, 0, reschedule)
+
+        Create a new wall clock timer, invoking the callback at ``offset`` plus
+        any multiple of ``interval`` seconds since the epoch, or only once at
+        ``offset`` if ``interval`` is zero. Unlike :meth:`recurring` it does not
+        drift with callback runtime and follows changes of system time, so timers
+        in many processes fire at the same moments. ::
+
+            # Flush stats at :00 of each minute
+            reactor.periodic(flush_cb, 0, 60)
+
+        With ``reschedule`` callback the next time is decided by the callback
+        which gets the current time and returns the time of the next event. ::
+
+            def reschedule(reactor, now):
+                return now + 60 - now % 60
+
+            reactor.periodic(flush_cb, 0, 0, reschedule)
+        """
+        if reschedule is None:
+            return self._watcher(cb, 'Periodic', (), self._loop.periodic, offset, interval)
+
+        reactor = weakref.proxy(self)
+
+        def scheduler(watcher, now):
+            return reschedule(reactor, now)
+
+        return self._watcher(cb, 'Periodic', (), self._loop.scheduler, scheduler)
+
+    def prepare(self, cb):
+        """::
+
+            wid = reactor.prepare(cb)
+
+        Invoke the callback once per loop iteration, just before the reactor
+        starts waiting for new events. Useful for flushing work coalesced by
+        event handlers. Note that an active prepare watcher keeps the reactor
+        running until it is removed. ::
+
+            def prepare_cb(reactor):
+                for stream in dirty:
+                    stream.flush()
+                dirty.clear()
+
+            reactor.prepare(prepare_cb)
+        """
+        return self._watcher(cb, 'Prepare', (), self._loop.prepare)
+
+    def readable(self, handle):
+        """::
+
+            future = reactor.readable(handle)
+            await reactor.readable(handle)
+
+        Return a :class:`Pyjo.Reactor.EV.Future.Pyjo_Reactor_EV_Future` resolved
+        when handle becomes readable. Handle does not need to be registered with
+        :meth:`io`.
+        """
+        return self._wait_io(handle.fileno(), pyev.EV_READ)
+
+    def reader(self, handle, cb, bufsize=65536, max_reads_per_tick=4):
+        """::
+
+            reactor = reactor.reader(handle, cb)
+            reactor = reactor.reader(handle, cb, bufsize=16384, max_reads_per_tick=1)
+
+        Watch non-blocking socket and read from it up to ``max_reads_per_tick``
+        times each time it becomes readable, invoking the callback with a
+        :class:`memoryview` of received data. Data is received with ``recv_into``
+        into a buffer shared by all readers with the same ``bufsize``, so the view
+        is valid only until the callback returns and must be copied if needed
+        later. On end of file handle is removed and the callback is invoked with
+        ``None``. On error handle is removed and the error is reported with
+        ``error`` event. ::
+
+            def read_cb(reactor, data):
+                if data is None:
+                    print('Closed')
+                else:
+                    parser.feed(data)
+
+            reactor.reader(handle, read_cb)
+        """
+        buf = self._buffers.get(bufsize)
+        if buf is None:
+            buf = self._buffers[bufsize] = memoryview(bytearray(bufsize))
+
+        fd = handle.fileno()
+        recv_into = handle.recv_into
+
+        def read_cb(reactor, writable):
+            io = reactor._ios.get(fd)
+            for i in range(max_reads_per_tick):
+                try:
+                    n = recv_into(buf)
+                except socket.error as e:
+                    if e.args[0] in NONBLOCKING:
+                        return
+                    reactor.remove(handle)
+                    raise
+
+                if not n:
+                    reactor.remove(handle)
+                    cb(reactor, None)
+                    return
+
+                cb(reactor, buf[:n])
+
+                # Short read means socket is drained, callback might have
+                # removed the handle
+                if n < bufsize or reactor._ios.get(fd) is not io:
+                    return
+
+        handle.setblocking(False)
+
+        return self.io(read_cb, handle).watch(handle, True, False)
+
+    def recurring(self, cb, after, priority=0):
+        """::
+
+            tid = reactor.recurring(cb, 0.25)
+            tid = reactor.recurring(cb, 0.25, priority=-1)
+
+        Create a new recurring timer, invoking the callback repeatedly after a given
+        amount of time in seconds.
+        """
+        return self._timer(cb, True, after, priority)
+
+    def remove(self, remove):
+        """::
+
+            boolean = reactor.remove(handle)
+            boolean = reactor.remove(tid)
+            boolean = reactor.remove(wid)
+
+        Remove handle, timer, periodic timer, signal, prepare, check or idle
+        watcher.
+        """
+        if isinstance(remove, str):
+            record = self._watchers.pop(remove, None)
+            if record is not None:
+                record.watcher.stop()
+                record.watcher = None
+                return True
+
+            record = self._timers.get(remove)
+            if record is not None and record.slot is not None:
+                self._wheel.remove(record)
+        elif remove is not None:
+            record = self._ios.get(remove.fileno())
+        else:
+            record = None
+
+        if record is not None and record.watcher is not None:
+            record.watcher.stop()
+            record.watcher = None
+
+        return super(Pyjo_Reactor_EV, self).remove(remove)
+
+    def reset(self):
+        """::
+
+            reactor.reset()
+
+        Remove all handles, timers and other watchers.
+        """
+        self._stop_watchers()
+        self._watchers.clear()
+
+        super(Pyjo_Reactor_EV, self).reset()
+
+    def run_in_thread(self, fn, cb=None):
+        """::
+
+            reactor.run_in_thread(fn, cb)
+
+        Call a blocking function in one of :attr:`threads` pool threads and
+        invoke the callback from the reactor thread with an exception or the
+        result. Reactor keeps running until the callback is invoked. ::
+
+            def done_cb(reactor, err, result):
+                if err:
+                    print('Failed: {0}'.format(err))
+                else:
+                    print(result)
+
+            reactor.run_in_thread(lambda: hashlib.sha256(data).hexdigest(), done_cb)
+        """
+        if self._jobs is None:
+            self._jobs = queue.Queue()
+
+        self._busy += 1
+        if len(self._workers) < self.threads and self._busy > len(self._workers):
+            worker = threading.Thread(target=_worker, args=(self._jobs, self._pending, self._async))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+        self._loop.ref()
+        self._jobs.put((fn, cb))
+
+    def sendfile(self, handle, fileobj, offset=0, count=None, cb=None):
+        """::
+
+            reactor = reactor.sendfile(handle, fileobj)
+            reactor = reactor.sendfile(handle, fileobj, offset, count, cb)
+
+        Queue part of a file for sending to non-blocking socket after any data
+        queued earlier with :meth:`write`, invoking the optional callback with an
+        exception or ``None`` and the number of bytes sent, once the whole part or
+        the rest of the file has been sent. File data is sent with
+        ``os.sendfile``, a bit more each time the socket becomes writable, and
+        never enters user space. File can be a file object or a descriptor and
+        must stay open until the callback is invoked. The handle is removed on
+        error. ::
+
+            def sent_cb(reactor, err, sent):
+                if err:
+                    print('Failed after {0} bytes: {1}'.format(sent, err))
+                f.close()
+
+            f = open('blob.bin', 'rb')
+            reactor.write(handle, headers).sendfile(handle, f, cb=sent_cb)
+        """
+        fd = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+        if count is None:
+            count = os.fstat(fd).st_size - offset
+
+        io = self._write_queue(handle)
+        io.queue.buffers.append(FileSpan(fd, offset, count, cb))
+        self._schedule_flush(io)
+
+        return self
+
+    def signal(self, cb, signum):
+        """::
+
+            wid = reactor.signal(cb, signal.SIGTERM)
+
+        Watch for a signal, invoking the callback with the signal number each
+        time it is delivered. Signals are handled by libev watchers, so the
+        callback runs from the loop like any other event. Use ``signalfd`` flag
+        (see `Backend`_) to avoid the wakeup pipe on Linux. Note that an active
+        signal watcher keeps the reactor running until it is removed. ::
+
+            def signal_cb(reactor, signum):
+                reactor.stop()
+
+            reactor.signal(signal_cb, signal.SIGINT)
+        """
+        return self._watcher(cb, 'Signal {0}'.format(signum), (signum,), self._loop.signal, signum)
+
+    def sleep(self, after):
+        """::
+
+            future = reactor.sleep(0.5)
+            await reactor.sleep(0.5)
+
+        Return a :class:`Pyjo.Reactor.EV.Future.Pyjo_Reactor_EV_Future` resolved
+        after a given amount of time in seconds.
+        """
+        future = Pyjo.Reactor.EV.Future.new(self)
+
+        if self._spare_timers:
+            watcher = self._spare_timers.pop()
+            watcher.set(after, 0)
+        else:
+            watcher = self._loop.timer(after, 0, self._future_cb)
+
+        watcher.data = future
+        watcher.start()
+        future.watcher = watcher
+        self._resolving.add(watcher)
+
+        return future
+
+    def spawn(self, coro):
+        """::
+
+            task = reactor.spawn(coro())
+
+        Run coroutine as a :class:`Pyjo.Reactor.EV.Future.Pyjo_Reactor_EV_Task`,
+        starting on the next tick. Coroutine is resumed directly from the
+        callback which resolves the awaited future. ::
+
+            async def main():
+                await reactor.sleep(1)
+                return 42
+
+            def done_cb(task):
+                print(task.result())
+
+            reactor.spawn(main()).add_done_callback(done_cb)
+        """
+        task = Pyjo.Reactor.EV.Future.Pyjo_Reactor_EV_Task(self, coro)
+        self.next_tick(task._step)
+        return task
+
+    @property
+    def stats(self):
+        """::
+
+            stats = reactor.stats
+
+        :class:`Pyjo.Reactor.EV.Stats.Pyjo_Reactor_EV_Stats` object collecting
+        statistics, or ``None`` if they are not enabled. See :meth:`enable_stats`.
+        """
+        return self._stats
+
+    def start(self):
+        """::
+
+            reactor.start()
+
+        Start watching for I/O and timer events, this will block until :meth:`stop` is
+        called.
+        """
+        self._run(0)
+
+    def stop(self):
+        """::
+
+            reactor.stop()
+
+        Stop watching for I/O and timer events.
+        """
+        self._loop.stop(pyev.EVBREAK_ALL)
+
+    def timer(self, cb, after, priority=0):
+        """::
+
+            tid = reactor.timer(cb, 0.5)
+            tid = reactor.timer(cb, 0.5, priority=-1)
+
+        Create a new timer, invoking the callback after a given amount of time in
+        seconds.
+        """
+        return self._timer(cb, False, after, priority)
+
+    def watch(self, handle, read, write, priority=None):
+        """::
+
+            reactor = reactor.watch(handle, read, write)
+            reactor = reactor.watch(handle, read, write, priority=2)
+
+        Change I/O events to watch handle for with true and false values. Meant to be
+        overloaded in a subclass. Note that this method requires an active I/O
+        watcher.
+
+        Changes are applied to libev watchers once per loop iteration, just
+        before the reactor waits for new events, so a handle that toggles its
+        events many times in one iteration updates its watcher only once.
+        """
+        mode = 0
+
+        if read:
+            mode |= pyev.EV_READ
+
+        if write:
+            mode |= pyev.EV_WRITE
+
+        fd = handle.fileno()
+
+        io = self._ios.get(fd)
+        if io is None:
+            io = self._ios[fd] = IoRecord(None, fd)
+
+        if priority is None:
+            priority = io.priority
+
+        stats = self._watch_stats
+        stats['requested'] += 1
+
+        if io.changed:
+            stats['coalesced'] += 1
+        elif mode == io.mode and priority == io.priority:
+            stats['skipped'] += 1
+            return self
+        else:
+            self._change(io)
+
+        io.mode = mode
+        io.priority = priority
+
+        return self
+
+    @property
+    def watch_stats(self):
+        """::
+
+            stats = reactor.watch_stats
+
+        Counters of :meth:`watch` calls: ``requested`` calls, ``skipped`` calls
+        which did not change I/O events, calls ``coalesced`` with an earlier
+        change in the same loop iteration and changes ``applied`` to libev
+        watchers.
+        """
+        return dict(self._watch_stats)
+
+    def writable(self, handle):
+        """::
+
+            future = reactor.writable(handle)
+            await reactor.writable(handle)
+
+        Return a :class:`Pyjo.Reactor.EV.Future.Pyjo_Reactor_EV_Future` resolved
+        when handle becomes writable. Handle does not need to be registered with
+        :meth:`io`.
+        """
+        return self._wait_io(handle.fileno(), pyev.EV_WRITE)
+
+    def write(self, handle, buffers, cb=None):
+        """::
+
+            reactor = reactor.write(handle, b'Hello!')
+            reactor = reactor.write(handle, [header, body], cb)
+
+        Queue data for writing to non-blocking socket, invoking the optional
+        callback once all queued data has been written. Data queued during one
+        loop iteration is written with a single ``sendmsg`` call just before the
+        reactor waits for new events. Write events are watched for only while
+        the kernel buffer is full, so handle does not need :meth:`watch` for
+        writing. Buffers are not copied and must not be modified until written.
+        Errors are reported with ``error`` event and remove the handle. ::
+
+            def drain_cb(reactor):
+                print('All data written')
+
+            reactor.write(handle, [b'HTTP/1.1 200 OK\r\n', headers, body], drain_cb)
+        """
+        io = self._write_queue(handle)
+        queue = io.queue
+
+        if isinstance(buffers, (bytes, bytearray, memoryview)):
+            buffers = (buffers,)
+        for buf in buffers:
+            if len(buf):
+                queue.buffers.append(memoryview(buf))
+
+        if cb is not None:
+            queue.callbacks.append(cb)
+
+        self._schedule_flush(io)
+
+        return self
+
+    def _apply_changes(self):
+        self._prepare.stop()
+
+        # Drain callbacks might write more data
+        while self._flushes:
+            flushes = self._flushes
+            self._flushes = []
+            for io in flushes:
+                io.queue.scheduled = False
+                if self._ios.get(io.fd) is io:
+                    self._sandbox(_flush, 'Write', io)
+
+        changes = self._changes
+        self._changes = []
+
+        applied = 0
+        for io in changes:
+            io.changed = False
+
+            # Handle might have been removed in the meantime
+            if self._ios.get(io.fd) is not io:
+                continue
+
+            mode = io.mode
+            if io.queue is not None and io.queue.armed:
+                mode |= pyev.EV_WRITE
+            watcher = io.watcher
+
+            if watcher is None:
+                if mode:
+                    watcher = io.watcher = self._loop.io(io.fd, mode, self._io_cb, io, io.priority)
+                    watcher.start()
+                    applied += 1
+            elif not mode:
+                watcher.stop()
+                io.watcher = None
+                applied += 1
+            elif watcher.events != mode or watcher.priority != io.priority:
+                watcher.stop()
+                watcher.set(io.fd, mode)
+                watcher.priority = io.priority
+                watcher.start()
+                applied += 1
+
+        self._watch_stats['applied'] += applied
+
+    def _change(self, io):
+        io.changed = True
+        if not self._changes and not self._flushes:
+            self._prepare.start()
+        self._changes.append(io)
+
+    def _drain(self):
+        pending = self._pending
+        for i in range(len(pending)):
+            cb, args = pending.popleft()
+            self._sandbox(cb, 'Thread callback', *args)
+
+    def _expire(self):
+        for timer in self._wheel.expire():
+            # Timer might have been removed or restarted by previous callback
+            if self._timers.get(timer.tid) is not timer or timer.slot is not None:
+                continue
+            if timer.recurring:
+                self._wheel.add(timer)
+            else:
+                self.remove(timer.tid)
+            self._fire(timer)
+
+    def _fire(self, timer):
+        self._sandbox(timer.cb, 'Timer {0}'.format(timer.tid))
+
+    def _hook(self, prepare_cb, check_cb, *watchers):
+        # Prepare watcher runs last before waiting, check watcher first after
+        # waiting, none of them keeps the reactor running
+        if prepare_cb is not None:
+            watchers = (self._loop.prepare(prepare_cb, None, pyev.EV_MINPRI), self._loop.check(check_cb, None, pyev.EV_MAXPRI)) + watchers
+            self._exits[watchers[0]] = prepare_cb
+        for watcher in watchers:
+            watcher.start()
+            self._loop.unref()
+        return watchers
+
+    def _io(self, watcher, revents):
+        io = watcher.data
+        queue = io.queue
+        flush = revents & pyev.EV_WRITE and queue is not None and queue.armed
+
+        # Events might have been changed since watcher was updated
+        revents &= io.mode
+        if io.combined:
+            if revents:
+                self._sandbox(io.cb, 'I/O', bool(revents & pyev.EV_READ), bool(revents & pyev.EV_WRITE))
+        else:
+            if revents & pyev.EV_READ:
+                self._sandbox(io.cb, 'Read', False)
+            # Read callback might have removed the handle
+            if revents & pyev.EV_WRITE and io.watcher is watcher:
+                self._sandbox(io.cb, 'Write', True)
+
+        if flush and io.watcher is watcher:
+            self._sandbox(_flush, 'Write', io)
+
+    def _notify(self, watcher, revents):
+        record = watcher.data
+        self._sandbox(record.cb, record.event, *record.args)
+
+        # Internal prepare watcher started by a prepare callback would only run
+        # after the loop has waited for new events
+        if record.event == 'Prepare' and (self._changes or self._flushes):
+            self._apply_changes()
+
+    def _stop_watchers(self):
+        self._prepare.stop()
+        for io in self._changes:
+            io.changed = False
+        self._changes = []
+        for io in self._flushes:
+            io.queue.scheduled = False
+        self._flushes = []
+
+        for records in self._ios, self._timers, self._watchers:
+            for record in records.values():
+                if record.watcher is not None:
+                    record.watcher.stop()
+                    record.watcher = None
+
+        if self._wheel is not None:
+            self._wheel.clear()
+
+        for watcher in self._resolving:
+            watcher.stop()
+            watcher.data.watcher = None
+        self._resolving.clear()
+
+        self._soon.clear()
+        self._soon_check.stop()
+        self._soon_idle.stop()
+
+    def _probe(self, probe):
+        if self._probes:
+            self._probes.append(probe)
+            return
+
+        probes = self._probes = [probe]
+
+        # Dispatch methods are only replaced while somebody is listening
+        reactor = weakref.ref(self)
+        cls = type(self)
+
+        def fire(timer):
+            t0 = steady_time()
+            cls._fire(reactor(), timer)
+            t1 = steady_time()
+            kind = 'timer' if timer.after else 'soon'
+            for probe in probes:
+                probe(kind, timer.tid, t0, t1)
+
+        def io(watcher, revents):
+            t0 = steady_time()
+            cls._io(reactor(), watcher, revents)
+            t1 = steady_time()
+            kind = _IO_KINDS[revents & (pyev.EV_READ | pyev.EV_WRITE)]
+            for probe in probes:
+                probe(kind, watcher.data.fd, t0, t1)
+
+        def notify(watcher, revents):
+            t0 = steady_time()
+            cls._notify(reactor(), watcher, revents)
+            t1 = steady_time()
+            for probe in probes:
+                probe('watcher', watcher.data.wid, t0, t1)
+
+        self._fire = fire
+        self._io = io
+        self._notify = notify
+
+    def _resolve(self, watcher, revents):
+        future = watcher.data
+        watcher.stop()
+        watcher.data = None
+        self._resolving.discard(watcher)
+
+        if isinstance(watcher, pyev.Timer):
+            self._spare_timers.append(watcher)
+        else:
+            self._spare_ios.append(watcher)
+
+        # Cancelled futures return their watchers here too
+        if future.watcher is watcher:
+            future.watcher = None
+            future.set_result(None)
+
+    def _run(self, flags):
+        try:
+            self._loop.start(flags)
+        finally:
+            # No prepare watcher runs when the loop returns after stop or one
+            # iteration, hooks are told with zero revents instead, unless the
+            # loop was run from a callback of an outer loop run
+            if self._exits and not self._loop.depth:
+                for watcher, prepare_cb in list(self._exits.items()):
+                    prepare_cb(watcher, 0)
+
+    def _run_soon(self):
+        soon = self._soon
+        for i in range(min(len(soon), self.tick_budget)):
+            # Queue might have been emptied by recursive call
+            if not soon:
+                break
+
+            timer = soon.popleft()
+
+            # Timer might have been removed in the meantime
+            if self._timers.get(timer.tid) is not timer:
+                continue
+
+            if timer.recurring:
+                soon.append(timer)
+            else:
+                self.remove(timer.tid)
+            self._fire(timer)
+
+        if not soon:
+            self._soon_check.stop()
+            self._soon_idle.stop()
+
+    def _schedule_flush(self, io):
+        queue = io.queue
+        if not queue.scheduled and not queue.armed:
+            queue.scheduled = True
+            if not self._changes and not self._flushes:
+                self._prepare.start()
+            self._flushes.append(io)
+
+    def _stop_threads(self):
+        for worker in self._workers:
+            self._jobs.put(None)
+        self._workers = []
+
+        self._loop.ref()
+        self._async.stop()
+
+    def _timeout(self, watcher, revents):
+        timer = watcher.data
+        if not timer.recurring:
+            self.remove(timer.tid)
+        self._fire(timer)
+
+    def _timer(self, cb, recurring, after, priority=0):
+        tid = super(Pyjo_Reactor_EV, self)._timer(cb, 0, 0)
+
+        timer = self._timers[tid] = TimerRecord(cb, tid, recurring, after)
+
+        if not after:
+            if not self._soon:
+                self._soon_check.start()
+                self._soon_idle.start()
+            self._soon.append(timer)
+        elif self._wheel is not None and after >= self._wheel.resolution:
+            self._wheel.add(timer)
+        else:
+            timer.watcher = self._loop.timer(after, after, self._timer_cb, timer, priority)
+            timer.watcher.start()
+
+        return tid
+
+    def _write_queue(self, handle):
+        fd = handle.fileno()
+
+        io = self._ios.get(fd)
+        if io is None:
+            io = self._ios[fd] = IoRecord(None, fd)
+
+        if io.queue is None:
+            io.queue = WriteQueue(handle)
+
+        return io
+
+    def _wait_io(self, fd, events):
+        future = Pyjo.Reactor.EV.Future.new(self)
+
+        if self._spare_ios:
+            watcher = self._spare_ios.pop()
+            watcher.set(fd, events)
+        else:
+            watcher = self._loop.io(fd, events, self._future_cb)
+
+        watcher.data = future
+        watcher.start()
+        future.watcher = watcher
+        self._resolving.add(watcher)
+
+        return future
+
+    def _unprobe(self, probe):
+        self._probes.remove(probe)
+        if not self._probes:
+            for name in '_fire', '_io', '_notify':
+                del self.__dict__[name]
+            self._probes = ()
+
+    def _unhook(self, watchers):
+        if watchers:
+            self._exits.pop(watchers[0], None)
+        for watcher in watchers:
+            if watcher.active:
+                self._loop.ref()
+                watcher.stop()
+
+    def _watcher(self, cb, event, args, factory, *params):
+        wid = 'w{0}'.format(next(self._wids))
+        record = self._watchers[wid] = WatcherRecord(cb, wid, event, args)
+        record.watcher = factory(*(params + (self._watcher_cb, record)))
+        record.watcher.start()
+        return wid
+
+
+def _dispatching(frame):
+    # Callback and its handle, timer or watcher found in the stack
+    cb = None
+    while frame is not None:
+        code = frame.f_code
+        if code is _SANDBOX:
+            cb = frame.f_locals.get('cb')
+        elif code is _FIRE:
+            return frame.f_locals['timer'].tid, cb
+        elif code is _IO:
+            return frame.f_locals['watcher'].data.fd, cb
+        elif code is _NOTIFY:
+            return frame.f_locals['watcher'].data.wid, cb
+        frame = frame.f_back
+    return None, cb
+
+
+def _done(reactor, cb, err, result):
+    reactor._busy -= 1
+    reactor._loop.unref()
+    if cb is not None:
+        cb(reactor, err, result)
+
+
+def _flush(reactor, io):
+    queue = io.queue
+    buffers = queue.buffers
+    handle = queue.handle
+
+    if buffers and isinstance(buffers[0], FileSpan):
+        if not _sendfile(reactor, handle, buffers):
+            return
+
+    elif buffers:
+        views = itertools.takewhile(lambda buf: not isinstance(buf, FileSpan), buffers)
+        try:
+            if hasattr(handle, 'sendmsg'):
+                sent = handle.sendmsg(list(itertools.islice(views, IOV_MAX)))
+            else:
+                sent = handle.send(buffers[0])
+        except socket.error as e:
+            if e.args[0] not in NONBLOCKING:
+                reactor.remove(handle)
+                raise
+            sent = 0
+
+        # Views are sliced without copying data
+        while sent:
+            size = len(buffers[0])
+            if sent < size:
+                buffers[0] = buffers[0][sent:]
+                break
+            buffers.popleft()
+            sent -= size
+
+    # Watch for write events only while kernel buffer is full
+    if bool(buffers) != queue.armed:
+        queue.armed = bool(buffers)
+        if not io.changed:
+            reactor._change(io)
+
+    if not buffers:
+        callbacks = queue.callbacks
+        queue.callbacks = []
+        for cb in callbacks:
+            reactor._sandbox(cb, 'Drain')
+
+
+def _sendfile(reactor, handle, buffers):
+    span = buffers[0]
+
+    try:
+        if hasattr(os, 'sendfile'):
+            sent = os.sendfile(handle.fileno(), span.fd, span.offset, span.count)
+        else:
+            os.lseek(span.fd, span.offset, os.SEEK_SET)
+            chunk = os.read(span.fd, min(span.count, 65536))
+            sent = handle.send(chunk) if chunk else 0
+    except (OSError, socket.error) as e:
+        if e.args[0] in NONBLOCKING:
+            return True
+        buffers.popleft()
+        reactor.remove(handle)
+        if span.cb is None:
+            raise
+        reactor._sandbox(span.cb, 'Sendfile', e, span.sent)
+        return False
+
+    span.offset += sent
+    span.count -= sent
+    span.sent += sent
+
+    # Nothing sent means end of file
+    if not sent or not span.count:
+        buffers.popleft()
+        if span.cb is not None:
+            reactor._sandbox(span.cb, 'Sendfile', None, span.sent)
+
+    return True
+
+
+def _mask(value, names):
+    if not value:
+        return 0
+
+    if isinstance(value, int):
+        return value
+
+    values = dict(names)
+    mask = 0
+    for name in value.replace(' ', '').lower().split(','):
+        if not name:
+            continue
+        if name not in values:
+            raise ValueError('Unknown libev backend or flag: {0}'.format(name))
+        mask |= values[name]
+
+    return mask
+
+
+def _worker(jobs, pending, watcher):
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+
+        fn, cb = job
+        try:
+            result = fn()
+        except Exception as e:
+            pending.append((_done, (cb, e, None)))
+        else:
+            pending.append((_done, (cb, None, result)))
+
+        watcher.send()
+
+
+def _code(method):
+    return getattr(method, '__func__', method).__code__
+
+
+_IO_KINDS = {pyev.EV_READ: 'read', pyev.EV_WRITE: 'write', pyev.EV_READ | pyev.EV_WRITE: 'io', 0: 'io'}
+
+_FIRE = _code(Pyjo_Reactor_EV._fire)
+_IO = _code(Pyjo_Reactor_EV._io)
+_NOTIFY = _code(Pyjo_Reactor_EV._notify)
+_SANDBOX = _code(Pyjo_Reactor_EV._sandbox)
+
+new = Pyjo_Reactor_EV.new
+object = Pyjo_Reactor_EV
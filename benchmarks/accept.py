@@ -0,0 +1,84 @@
+"""
+Accept rate of :meth:`Pyjo.Reactor.EV.acceptor` compared with accepting one
+connection for each readiness event.
+
+Usage:
+
+    python benchmarks/accept.py [connections] [max_per_tick]
+
+A child process opens the given number of connections as fast as it can and
+closes each right after connect.
+"""
+
+import Pyjo.Reactor.EV
+
+import multiprocessing
+import socket
+import sys
+import time
+
+
+connections = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+max_per_tick = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+
+def connect(address, n):
+    for i in range(n):
+        s = socket.create_connection(address)
+        s.close()
+
+
+def listener():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(socket.SOMAXCONN)
+    sock.setblocking(False)
+    return sock
+
+
+def run(name, register):
+    reactor = Pyjo.Reactor.EV.new()
+    sock = listener()
+    accepted = [0]
+    register(reactor, sock, accepted)
+
+    client = multiprocessing.Process(target=connect, args=(sock.getsockname(), connections))
+    t0 = time.time()
+    client.start()
+    reactor.recurring(lambda reactor: accepted[0] >= connections and reactor.stop(), 0.01)
+    reactor.start()
+    t1 = time.time()
+    client.join()
+    sock.close()
+
+    print('{0:<10} {1:>10.0f} accepts/s'.format(name, connections / (t1 - t0)))
+
+
+def single(reactor, sock, accepted):
+
+    def io_cb(reactor, writable):
+        try:
+            conn, address = sock.accept()
+        except socket.error:
+            return
+        conn.setblocking(False)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.close()
+        accepted[0] += 1
+
+    reactor.io(io_cb, sock).watch(sock, True, False)
+
+
+def batched(reactor, sock, accepted):
+
+    def accept_cb(reactor, batch):
+        for conn, address in batch:
+            conn.close()
+        accepted[0] += len(batch)
+
+    reactor.acceptor(sock, accept_cb, max_per_tick=max_per_tick)
+
+
+run('single', single)
+run('acceptor', batched)
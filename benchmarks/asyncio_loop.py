@@ -0,0 +1,76 @@
+"""
+:mod:`Pyjo.Reactor.EV.Asyncio` compared with the default asyncio loop.
+
+Usage:
+
+    python benchmarks/asyncio_loop.py [count]
+
+Measures ``call_soon`` callbacks, ``sleep(0)`` task switches and echo round
+trips over loopback TCP with streams.
+"""
+
+import Pyjo.Reactor.EV
+import Pyjo.Reactor.EV.Asyncio
+
+import asyncio
+import sys
+import time
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+
+async def call_soon():
+    loop = asyncio.get_event_loop()
+    done = loop.create_future()
+    left = [count]
+
+    def cb():
+        left[0] -= 1
+        if left[0]:
+            loop.call_soon(cb)
+        else:
+            done.set_result(None)
+
+    loop.call_soon(cb)
+    await done
+
+
+async def sleep_zero():
+    for i in range(count):
+        await asyncio.sleep(0)
+
+
+async def echo(reader, writer):
+    while True:
+        data = await reader.read(100)
+        if not data:
+            break
+        writer.write(data)
+    writer.close()
+
+
+async def round_trips():
+    server = await asyncio.start_server(echo, '127.0.0.1', 0)
+    reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname())
+    for i in range(count // 10):
+        writer.write(b'ping')
+        await reader.readexactly(4)
+    writer.close()
+    server.close()
+    await server.wait_closed()
+
+
+def run(name, loop):
+    asyncio.set_event_loop(loop)
+    results = []
+    for scenario, n in (call_soon, count), (sleep_zero, count), (round_trips, count // 10):
+        t0 = time.time()
+        loop.run_until_complete(scenario())
+        results.append('{0} {1:>10.0f}/s'.format(scenario.__name__, n / (time.time() - t0)))
+    loop.close()
+    print('{0:<8} {1}'.format(name, '  '.join(results)))
+
+
+run('default', asyncio.new_event_loop())
+run('ev', Pyjo.Reactor.EV.Asyncio.new(Pyjo.Reactor.EV.new()))
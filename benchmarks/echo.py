@@ -0,0 +1,91 @@
+"""
+Write heavy echo server on :mod:`Pyjo.Reactor.EV`.
+
+Usage:
+
+    python benchmarks/echo.py [seconds] [connections] [size]
+
+Each client sends a message and waits for the echo. The server writes the
+reply and toggles write interest the same way a stream does: it watches for
+writability after each write and goes back to reading once the reply is sent.
+Reports round trips per second and how many :meth:`watch` calls were
+coalesced or skipped.
+"""
+
+import Pyjo.Reactor.EV
+
+import errno
+import socket
+import sys
+
+
+seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+connections = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+size = int(sys.argv[3]) if len(sys.argv) > 3 else 4096
+
+NONBLOCKING = (errno.EAGAIN, errno.EWOULDBLOCK)
+
+reactor = Pyjo.Reactor.EV.new()
+message = b'x' * size
+round_trips = [0]
+
+
+def server(sock):
+    buf = [b'']
+
+    def io_cb(reactor, writable):
+        if writable:
+            while buf[0]:
+                try:
+                    sent = sock.send(buf[0])
+                except socket.error as e:
+                    if e.args[0] in NONBLOCKING:
+                        return
+                    raise
+                buf[0] = buf[0][sent:]
+                # Stream layer requests write interest after each write
+                reactor.watch(sock, True, True)
+            reactor.watch(sock, True, False)
+        else:
+            chunk = sock.recv(65536)
+            if chunk:
+                buf[0] += chunk
+                reactor.watch(sock, True, True)
+
+    reactor.io(io_cb, sock).watch(sock, True, False)
+
+
+def client(sock):
+    received = [0]
+
+    def io_cb(reactor, writable):
+        chunk = sock.recv(65536)
+        received[0] += len(chunk)
+        if received[0] >= size:
+            received[0] -= size
+            round_trips[0] += 1
+            sock.sendall(message)
+
+    reactor.io(io_cb, sock).watch(sock, True, False)
+    sock.sendall(message)
+
+
+pairs = []
+for i in range(connections):
+    a, b = socket.socketpair()
+    a.setblocking(False)
+    pairs.append((a, b))
+    server(a)
+    client(b)
+
+reactor.timer(lambda reactor: reactor.stop(), seconds)
+reactor.start()
+
+print('{0:<12} {1:>12.0f}'.format('round trips/s', round_trips[0] / seconds))
+for name, value in sorted(reactor.watch_stats.items()):
+    print('{0:<12} {1:>12}'.format(name, value))
+
+reactor.reset()
+for a, b in pairs:
+    a.close()
+    b.close()
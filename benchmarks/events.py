@@ -0,0 +1,61 @@
+"""
+Events per second dispatched through :meth:`Pyjo.Reactor.EV.io` and
+:meth:`Pyjo.Reactor.EV.recurring`.
+
+Usage:
+
+    python benchmarks/events.py [seconds] [min_io_rate] [min_recurring_rate]
+
+Exits with non-zero status if any rate is below the given minimum, so it can
+be used to catch regressions.
+"""
+
+import Pyjo.Reactor.EV
+
+import socket
+import sys
+
+
+seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+minimum = [float(a) for a in sys.argv[2:4]] + [0.0, 0.0]
+
+
+def io_rate():
+    reactor = Pyjo.Reactor.EV.new()
+    a, b = socket.socketpair()
+    events = [0]
+
+    def io_cb(reactor, writable):
+        events[0] += 1
+
+    # Socket is always writable so each iteration dispatches one event
+    reactor.io(io_cb, a).watch(a, False, True)
+    reactor.timer(lambda reactor: reactor.stop(), seconds)
+    reactor.start()
+    reactor.remove(a)
+    a.close()
+    b.close()
+    return events[0] / seconds
+
+
+def recurring_rate():
+    reactor = Pyjo.Reactor.EV.new()
+    events = [0]
+
+    def recurring_cb(reactor):
+        events[0] += 1
+
+    reactor.recurring(recurring_cb, 0)
+    reactor.timer(lambda reactor: reactor.stop(), seconds)
+    reactor.start()
+    return events[0] / seconds
+
+
+status = 0
+for name, rate, limit in ('io', io_rate(), minimum[0]), ('recurring', recurring_rate(), minimum[1]):
+    print('{0:<10} {1:>12.0f} events/s'.format(name, rate))
+    if rate < limit:
+        print('{0:<10} below minimum of {1:.0f} events/s'.format(name, limit))
+        status = 1
+
+sys.exit(status)
@@ -0,0 +1,145 @@
+"""
+HTTP keep-alive load generator.
+
+Usage:
+
+    python benchmarks/loadgen.py host:port [seconds] [connections] [processes]
+
+Opens the given number of keep-alive connections spread over the given number
+of processes and sends one request at a time on each of them, the next one as
+soon as the response headers arrive. Responses are expected to have no body,
+like the ones of ``examples/microhttpd.py`` and ``examples/microhttpd_ev.py``.
+Prints requests per second, errors and latency percentiles as JSON.
+"""
+
+import json
+import multiprocessing
+import selectors
+import socket
+import sys
+import time
+
+from array import array
+
+
+REQUEST = b'GET / HTTP/1.1\r\nHost: localhost\r\nConnection: Keep-Alive\r\n\r\n'
+
+
+class Client(object):
+    __slots__ = ('buf', 'sent', 'sock')
+
+    def __init__(self, address):
+        self.buf = b''
+        self.sock = socket.create_connection(address)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setblocking(False)
+        self.sent = time.perf_counter()
+        self.sock.send(REQUEST)
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def run(address, seconds=5.0, connections=50):
+    selector = selectors.DefaultSelector()
+    latencies = array('d')
+    errors = [0]
+
+    def connect():
+        client = Client(address)
+        selector.register(client.sock, selectors.EVENT_READ, client)
+
+    def drop(client):
+        errors[0] += 1
+        selector.unregister(client.sock)
+        client.sock.close()
+        connect()
+
+    for i in range(connections):
+        connect()
+
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+
+        for key, mask in selector.select(deadline - now):
+            client = key.data
+            try:
+                data = client.sock.recv(65536)
+            except BlockingIOError:
+                continue
+            except socket.error:
+                data = b''
+
+            # Server closed connection
+            if not data:
+                drop(client)
+                continue
+
+            buf = client.buf + data
+            while True:
+                end = buf.find(b'\r\n\r\n')
+                if end < 0:
+                    break
+                if not buf.startswith(b'HTTP/1.1 200 '):
+                    errors[0] += 1
+                now = time.perf_counter()
+                latencies.append(now - client.sent)
+                buf = buf[end + 4:]
+                client.sent = now
+                client.sock.send(REQUEST)
+            client.buf = buf
+
+    elapsed = time.perf_counter() - start
+    for key in list(selector.get_map().values()):
+        key.fileobj.close()
+    selector.close()
+
+    return {'requests': len(latencies), 'errors': errors[0], 'seconds': elapsed, 'latencies': latencies}
+
+
+def _run(args):
+    return run(*args)
+
+
+def load(address, seconds=5.0, connections=50, processes=1):
+    """Run load generators in processes and merge their results."""
+    shares = [connections // processes + (i < connections % processes) for i in range(processes)]
+    jobs = [(address, seconds, share) for share in shares if share]
+
+    if len(jobs) == 1:
+        results = [run(*jobs[0])]
+    else:
+        pool = multiprocessing.Pool(len(jobs))
+        try:
+            results = pool.map(_run, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+    latencies = sorted(latency for result in results for latency in result['latencies'])
+    requests = sum(result['requests'] for result in results)
+    elapsed = max(result['seconds'] for result in results)
+
+    return {
+        'requests': requests,
+        'errors': sum(result['errors'] for result in results),
+        'requests_per_second': requests / elapsed,
+        'p50_us': percentile(latencies, 0.5) * 1e6 if latencies else None,
+        'p99_us': percentile(latencies, 0.99) * 1e6 if latencies else None,
+    }
+
+
+if __name__ == '__main__':
+    host, port = sys.argv[1].rsplit(':', 1)
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    connections = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    processes = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+
+    print(json.dumps(load((host, int(port)), seconds, connections, processes), indent=2, sort_keys=True))
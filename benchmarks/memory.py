@@ -0,0 +1,100 @@
+"""
+Memory used by registered handles and timers.
+
+Usage:
+
+    python benchmarks/memory.py [count]
+
+Reports bytes per registration for :mod:`Pyjo.Reactor.EV` and for the
+legacy layout (dict of dicts with a closure and a weak proxy for each
+watcher) built directly on top of :mod:`pyev`. Only allocations made by
+Python are counted, memory used by libev itself is the same in both cases.
+"""
+
+import Pyjo.Reactor.EV
+
+import pyev
+import resource
+import socket
+import sys
+import tracemalloc
+import weakref
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+
+def legacy_io(loop, ios, reactor, handle):
+    fd = handle.fileno()
+    ios[fd] = {'cb': lambda reactor, write: None}
+
+    def watcher_cb(watcher, revents):
+        if dir(reactor):
+            pass
+
+    watcher = loop.io(fd, pyev.EV_READ | pyev.EV_WRITE, watcher_cb)
+    watcher.start()
+    ios[fd]['watcher'] = watcher
+
+
+def legacy_timer(loop, timers, reactor, tid):
+    timers[tid] = {'cb': lambda reactor: None, 'after': 0, 'time': 0}
+
+    def watcher_cb(watcher, revents):
+        if dir(reactor):
+            pass
+
+    watcher = loop.timer(60, 60, watcher_cb)
+    watcher.start()
+    timers[tid]['watcher'] = watcher
+
+
+def measure(name, register, n, apply=None):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(n):
+        register(i)
+    if apply is not None:
+        apply()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print('{0:<16} {1:>8} registrations {2:>8.1f} bytes per registration'.format(name, n, float(after - before) / n))
+
+
+soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+try:
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    soft = hard
+except (ValueError, resource.error):
+    pass
+
+sockets = []
+while len(sockets) < min(count, soft - 64):
+    sockets.append(socket.socket())
+
+if len(sockets) < count:
+    print('Only {0} file descriptors available'.format(len(sockets)))
+
+# Pyjo.Reactor.EV, watchers for handles are created by the next loop iteration
+reactor = Pyjo.Reactor.EV.new()
+measure('ev io', lambda i: reactor.io(lambda reactor, write: None, sockets[i]), len(sockets),
+        lambda: reactor._loop.start(pyev.EVRUN_NOWAIT))
+measure('ev timer', lambda i: reactor.timer(lambda reactor: None, 60), count)
+reactor.reset()
+reactor = None
+
+
+# Legacy layout
+class Reactor(object):
+    pass
+
+
+loop = pyev.Loop()
+owner = Reactor()
+ios = {}
+timers = {}
+measure('legacy io', lambda i: legacy_io(loop, ios, weakref.proxy(owner), sockets[i]), len(sockets))
+measure('legacy timer', lambda i: legacy_timer(loop, timers, weakref.proxy(owner), '{0:032x}'.format(i)), count)
+
+for s in sockets:
+    s.close()
@@ -0,0 +1,81 @@
+"""
+Throughput of :meth:`Pyjo.Reactor.EV.sendfile` compared with reading a file
+into Python and writing it with :meth:`Pyjo.Reactor.EV.write`.
+
+Usage:
+
+    python benchmarks/sendfile.py [megabytes]
+
+Serves a temporary file of given size (1 GB by default) over loopback TCP to a
+child process which reads and discards the data.
+"""
+
+import Pyjo.Reactor.EV
+
+import multiprocessing
+import socket
+import sys
+import tempfile
+import time
+
+
+megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+size = megabytes * 1024 * 1024
+
+
+def sink(address):
+    s = socket.create_connection(address)
+    while s.recv(1048576):
+        pass
+    s.close()
+
+
+def serve(name, send):
+    listen = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen.bind(('127.0.0.1', 0))
+    listen.listen(1)
+    client = multiprocessing.Process(target=sink, args=(listen.getsockname(),))
+    client.start()
+    conn, address = listen.accept()
+    conn.setblocking(False)
+
+    reactor = Pyjo.Reactor.EV.new()
+    t0 = time.time()
+    send(reactor, conn)
+    reactor.start()
+    t1 = time.time()
+
+    conn.close()
+    listen.close()
+    client.join()
+
+    print('{0:<10} {1:>10.1f} MB/s'.format(name, megabytes / (t1 - t0)))
+
+
+def with_sendfile(reactor, conn):
+    reactor.sendfile(conn, f, 0, size, lambda reactor, err, sent: reactor.remove(conn))
+
+
+def with_write(reactor, conn):
+    f.seek(0)
+
+    def next_chunk(reactor):
+        chunk = f.read(1048576)
+        if chunk:
+            reactor.write(conn, chunk, next_chunk)
+        else:
+            reactor.remove(conn)
+
+    next_chunk(reactor)
+
+
+f = tempfile.TemporaryFile()
+block = b'x' * 1048576
+for i in range(megabytes):
+    f.write(block)
+f.flush()
+
+serve('sendfile', with_sendfile)
+serve('write', with_write)
+
+f.close()
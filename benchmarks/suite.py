@@ -0,0 +1,611 @@
+"""
+Benchmark suite comparing :mod:`Pyjo.Reactor.EV`, :mod:`Pyjo.Reactor.Select`
+and raw :mod:`pyev`.
+
+Usage:
+
+    python benchmarks/suite.py [options] > results.json
+    python benchmarks/suite.py --compare old.json new.json
+
+Scenarios:
+
+``timer_churn``
+    Timers created and removed in batches of 1000.
+``recurring``
+    Zero interval recurring callbacks per second, an idle watcher for raw pyev.
+``watch_toggle``
+    Write interest of 100 always writable sockets switched off in the I/O
+    callback and back on from a recurring callback, start and stop of
+    watchers for raw pyev.
+``ping_pong``
+    Round trips of one byte over a socketpair with latency percentiles.
+``idle_connections``
+    Ping-pong round trips with 1k, 10k and 50k idle sockets registered for
+    reading, time to register them and handle the first round trip, and
+    resident memory they take.
+``http_keepalive``
+    Requests per second and per CPU second of the server for
+    ``examples/microhttpd.py`` on each reactor (chosen with ``PYJO_REACTOR``)
+    and ``examples/microhttpd_ev.py`` for raw pyev, loaded over keep-alive
+    connections by ``benchmarks/loadgen.py``.
+
+Each scenario and backend runs in a new process, repeated ``--repeat`` times
+with the median of each metric reported. Results are written as JSON together
+with versions, platform and git commit, so runs of different commits can be
+compared with ``--compare``. Failures, like :mod:`Pyjo.Reactor.Select` running
+out of ``select()`` descriptors, are recorded as errors of the scenario.
+
+``--check`` runs every scenario on every backend once with small sizes, well
+within ``select()`` limits, and exits with non-zero status if any of them
+does not return metrics, so the harness itself can be verified quickly.
+"""
+
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+from array import array
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules of this tree are measured, not installed ones
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
+
+import loadgen  # noqa: E402
+
+
+BACKENDS = ('ev', 'select', 'pyev')
+
+REACTORS = {'ev': 'Pyjo.Reactor.EV', 'select': 'Pyjo.Reactor.Select'}
+
+
+def new_reactor(backend):
+    __import__(REACTORS[backend])
+    return sys.modules[REACTORS[backend]].new()
+
+
+def new_loop():
+    import pyev
+    return pyev.Loop()
+
+
+def clock():
+    return time.perf_counter()
+
+
+def timer_churn(backend, opts):
+    count = opts.count
+    batch = 1000
+
+    if backend == 'pyev':
+        loop = new_loop()
+
+        def cb(watcher, revents):
+            pass
+
+        t0 = clock()
+        for i in range(count // batch):
+            watchers = [loop.timer(60, 0, cb) for j in range(batch)]
+            for watcher in watchers:
+                watcher.start()
+            for watcher in watchers:
+                watcher.stop()
+        elapsed = clock() - t0
+
+    else:
+        reactor = new_reactor(backend)
+
+        def cb(reactor):
+            pass
+
+        t0 = clock()
+        for i in range(count // batch):
+            tids = [reactor.timer(cb, 60) for j in range(batch)]
+            for tid in tids:
+                reactor.remove(tid)
+        elapsed = clock() - t0
+
+    return {'timers_per_second': count // batch * batch / elapsed}
+
+
+def recurring(backend, opts):
+    calls = [0]
+
+    if backend == 'pyev':
+        import pyev
+        loop = new_loop()
+
+        def idle_cb(watcher, revents):
+            calls[0] += 1
+
+        def stop_cb(watcher, revents):
+            loop.stop(pyev.EVBREAK_ALL)
+
+        watchers = [loop.idle(idle_cb), loop.timer(opts.seconds, 0, stop_cb)]
+        for watcher in watchers:
+            watcher.start()
+        t0 = clock()
+        loop.start()
+        elapsed = clock() - t0
+
+    else:
+        reactor = new_reactor(backend)
+
+        def recurring_cb(reactor):
+            calls[0] += 1
+
+        reactor.recurring(recurring_cb, 0)
+        reactor.timer(lambda reactor: reactor.stop(), opts.seconds)
+        t0 = clock()
+        reactor.start()
+        elapsed = clock() - t0
+
+    return {'calls_per_second': calls[0] / elapsed}
+
+
+def watch_toggle(backend, opts):
+    pairs = [socket.socketpair() for i in range(100)]
+    toggles = [0]
+    off = []
+
+    if backend == 'pyev':
+        import pyev
+        loop = new_loop()
+
+        def io_cb(watcher, revents):
+            watcher.stop()
+            off.append(watcher)
+            toggles[0] += 1
+
+        def idle_cb(watcher, revents):
+            for io in off:
+                io.start()
+            toggles[0] += len(off)
+            del off[:]
+
+        def stop_cb(watcher, revents):
+            loop.stop(pyev.EVBREAK_ALL)
+
+        watchers = [loop.io(a, pyev.EV_WRITE, io_cb) for a, b in pairs]
+        watchers += [loop.idle(idle_cb), loop.timer(opts.seconds, 0, stop_cb)]
+        for watcher in watchers:
+            watcher.start()
+        t0 = clock()
+        loop.start()
+        elapsed = clock() - t0
+
+    else:
+        reactor = new_reactor(backend)
+
+        def io_cb(reactor, writable, handle):
+            reactor.watch(handle, False, False)
+            off.append(handle)
+            toggles[0] += 1
+
+        def recurring_cb(reactor):
+            for handle in off:
+                reactor.watch(handle, False, True)
+            toggles[0] += len(off)
+            del off[:]
+
+        for a, b in pairs:
+            reactor.io(lambda reactor, writable, a=a: io_cb(reactor, writable, a), a).watch(a, False, True)
+        reactor.recurring(recurring_cb, 0)
+        reactor.timer(lambda reactor: reactor.stop(), opts.seconds)
+        t0 = clock()
+        reactor.start()
+        elapsed = clock() - t0
+
+    for a, b in pairs:
+        a.close()
+        b.close()
+
+    return {'toggles_per_second': toggles[0] / elapsed}
+
+
+def pingpong(backend, seconds=None, count=None, prepare=None):
+    """Run round trips over a socketpair for a number of seconds or times."""
+    a, b = socket.socketpair()
+    a.setblocking(False)
+    b.setblocking(False)
+    latencies = array('d')
+    state = {'sent': 0.0, 'deadline': None}
+
+    def pong():
+        now = clock()
+        latencies.append(now - state['sent'])
+        if state['deadline'] is None and seconds is not None:
+            state['deadline'] = now + seconds
+        if count is not None and len(latencies) >= count or seconds is not None and now >= state['deadline']:
+            return False
+        state['sent'] = clock()
+        a.send(b'x')
+        return True
+
+    if backend == 'pyev':
+        import pyev
+        loop = new_loop()
+        extra = prepare(loop) if prepare is not None else None
+
+        def a_cb(watcher, revents):
+            a.recv(1)
+            if not pong():
+                loop.stop(pyev.EVBREAK_ALL)
+
+        def b_cb(watcher, revents):
+            b.send(b.recv(1))
+
+        watchers = [loop.io(a, pyev.EV_READ, a_cb), loop.io(b, pyev.EV_READ, b_cb)]
+        for watcher in watchers:
+            watcher.start()
+        state['sent'] = clock()
+        a.send(b'x')
+        loop.start()
+        for watcher in watchers:
+            watcher.stop()
+
+    else:
+        reactor = new_reactor(backend)
+        extra = prepare(reactor) if prepare is not None else None
+
+        def a_cb(reactor, writable):
+            a.recv(1)
+            if not pong():
+                reactor.stop()
+
+        def b_cb(reactor, writable):
+            b.send(b.recv(1))
+
+        reactor.io(a_cb, a).watch(a, True, False)
+        reactor.io(b_cb, b).watch(b, True, False)
+        state['sent'] = clock()
+        a.send(b'x')
+        reactor.start()
+        reactor.remove(a)
+        reactor.remove(b)
+
+    a.close()
+    b.close()
+
+    # First round trip includes applying registrations
+    steady = sorted(latencies[1:]) or [latencies[0]]
+    elapsed = sum(steady)
+
+    return extra, {
+        'first_round_trip_seconds': latencies[0],
+        'round_trips_per_second': len(steady) / elapsed if elapsed else None,
+        'mean_us': elapsed / len(steady) * 1e6,
+        'p50_us': loadgen.percentile(steady, 0.5) * 1e6,
+        'p99_us': loadgen.percentile(steady, 0.99) * 1e6,
+    }
+
+
+def ping_pong(backend, opts):
+    extra, metrics = pingpong(backend, count=opts.count // 5)
+    return metrics
+
+
+def idle_connections(backend, opts, connections):
+    need = connections + 256
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < need:
+        if hard != resource.RLIM_INFINITY and hard < need:
+            raise RuntimeError('{0} file descriptors needed, limit is {1}'.format(need, hard))
+        resource.setrlimit(resource.RLIMIT_NOFILE, (need, hard))
+
+    # One descriptor for each connection, datagram sockets which are never
+    # readable stand in for idle clients
+    socks = []
+    for i in range(connections):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        socks.append(sock)
+
+    def idle_cb(*args):
+        pass
+
+    def prepare(target):
+        rss = resident()
+        t0 = clock()
+        if backend == 'pyev':
+            import pyev
+            watchers = [target.io(sock, pyev.EV_READ, idle_cb) for sock in socks]
+            for watcher in watchers:
+                watcher.start()
+        else:
+            watchers = None
+            for sock in socks:
+                target.io(idle_cb, sock).watch(sock, True, False)
+        return {'register': clock() - t0, 'rss': rss, 'watchers': watchers}
+
+    extra, metrics = pingpong(backend, seconds=opts.seconds, prepare=prepare)
+
+    # Registrations might only be applied in the first loop iteration
+    metrics['setup_seconds'] = extra['register'] + metrics.pop('first_round_trip_seconds')
+    if extra['rss'] is not None:
+        metrics['rss_kb_per_connection'] = (resident() - extra['rss']) / float(connections)
+
+    for sock in socks:
+        sock.close()
+
+    return metrics
+
+
+def http_keepalive(backend, opts):
+    probe = socket.socket()
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([ROOT] + [path for path in [env.get('PYTHONPATH')] if path])
+    if backend == 'pyev':
+        cmd = [sys.executable, os.path.join(ROOT, 'examples', 'microhttpd_ev.py'), str(port)]
+    else:
+        env['PYJO_REACTOR'] = REACTORS[backend]
+        cmd = [sys.executable, os.path.join(ROOT, 'examples', 'microhttpd.py'), 'address=127.0.0.1', 'port={0}'.format(port)]
+
+    errors = tempfile.TemporaryFile()
+    server = subprocess.Popen(cmd, env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=errors)
+    try:
+        deadline = clock() + 10
+        while True:
+            if server.poll() is not None:
+                errors.seek(0)
+                lines = errors.read().decode('utf-8', 'replace').strip().splitlines()
+                raise RuntimeError('Server exited with status {0}: {1}'.format(server.returncode, lines[-1] if lines else ''))
+            try:
+                socket.create_connection(('127.0.0.1', port)).close()
+                break
+            except socket.error:
+                if clock() > deadline:
+                    raise RuntimeError('Server did not start')
+                time.sleep(0.05)
+
+        metrics = loadgen.load(('127.0.0.1', port), opts.seconds, opts.http_connections, opts.http_processes)
+    finally:
+        cpu = None
+        if server.poll() is None:
+            server.send_signal(signal.SIGTERM)
+
+            # Reaped here to get resource usage of the server
+            deadline = clock() + 10
+            while True:
+                pid, status, usage = os.wait4(server.pid, os.WNOHANG)
+                if pid:
+                    server.returncode = status
+                    cpu = usage.ru_utime + usage.ru_stime
+                    break
+                if clock() > deadline:
+                    server.kill()
+                    deadline = float('inf')
+                time.sleep(0.05)
+        errors.close()
+
+    metrics['server_cpu_seconds'] = cpu
+    metrics['requests_per_cpu_second'] = metrics['requests'] / cpu if cpu else None
+    return metrics
+
+
+def resident():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 1024.0
+    except (IOError, OSError):
+        return None
+
+
+SCENARIOS = collections.OrderedDict([
+    ('timer_churn', timer_churn),
+    ('recurring', recurring),
+    ('watch_toggle', watch_toggle),
+    ('ping_pong', ping_pong),
+    ('idle_connections', idle_connections),
+    ('http_keepalive', http_keepalive),
+])
+
+
+def jobs(opts):
+    for scenario in opts.scenario:
+        if scenario == 'idle_connections':
+            params = [{'connections': n} for n in opts.connections]
+        else:
+            params = [{}]
+        for kwargs in params:
+            for backend in opts.backend:
+                yield scenario, backend, kwargs
+
+
+def child(conn, scenario, backend, opts, kwargs):
+    try:
+        conn.send({'metrics': SCENARIOS[scenario](backend, opts, **kwargs)})
+    except BaseException as e:
+        conn.send({'error': '{0}: {1}'.format(type(e).__name__, e), 'traceback': traceback.format_exc()})
+    finally:
+        conn.close()
+
+
+def isolated(scenario, backend, opts, kwargs):
+    """Run a scenario in a new process."""
+    parent, conn = multiprocessing.Pipe(False)
+    process = multiprocessing.Process(target=child, args=(conn, scenario, backend, opts, kwargs))
+    process.start()
+    conn.close()
+
+    result = None
+    if parent.poll(opts.seconds * 20 + 120):
+        try:
+            result = parent.recv()
+        except EOFError:
+            pass
+    if process.is_alive():
+        process.terminate()
+    process.join()
+
+    if result is None:
+        result = {'error': 'No result, exit code {0}'.format(process.exitcode)}
+    return result
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def run(opts):
+    results = []
+    for scenario, backend, kwargs in jobs(opts):
+        runs = []
+        for i in range(opts.repeat):
+            result = isolated(scenario, backend, opts, kwargs)
+            if 'error' in result:
+                runs = result
+                break
+            runs.append(result['metrics'])
+
+        entry = {'scenario': scenario, 'backend': backend, 'params': kwargs}
+        if isinstance(runs, dict):
+            entry['error'] = runs['error']
+            sys.stderr.write(runs.get('traceback', ''))
+        else:
+            entry['metrics'] = dict((key, median([r[key] for r in runs]) if None not in [r[key] for r in runs] else None) for key in runs[0])
+            entry['runs'] = runs
+        results.append(entry)
+
+        sys.stderr.write('{0}\n'.format(summary(entry)))
+        sys.stderr.flush()
+
+    return {'meta': meta(opts), 'results': results}
+
+
+def meta(opts):
+    info = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpus': multiprocessing.cpu_count(),
+        'options': dict((key, value) for key, value in vars(opts).items() if key not in ('compare', 'output')),
+    }
+
+    try:
+        import pyev
+        info['pyev'], info['libev'] = pyev.version()
+    except Exception:
+        pass
+
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL)
+        info['commit'] = commit.decode().strip()
+        dirty = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT, stderr=subprocess.DEVNULL)
+        info['dirty'] = bool(dirty.strip())
+    except (OSError, subprocess.CalledProcessError):
+        pass
+
+    return info
+
+
+def name(entry):
+    params = ' '.join('{0}={1}'.format(key, value) for key, value in sorted(entry['params'].items()))
+    return '{0:<17} {1:<7} {2:<18}'.format(entry['scenario'], entry['backend'], params)
+
+
+def summary(entry):
+    if 'error' in entry:
+        return '{0} error: {1}'.format(name(entry), entry['error'])
+    metrics = '  '.join('{0}={1}'.format(key, fmt(value)) for key, value in sorted(entry['metrics'].items()))
+    return '{0} {1}'.format(name(entry), metrics)
+
+
+def fmt(value):
+    if isinstance(value, float):
+        return '{0:.4g}'.format(value)
+    return str(value)
+
+
+def compare(old_path, new_path):
+    """Print ratios of metrics of two result files."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    def key(entry):
+        return entry['scenario'], entry['backend'], json.dumps(entry['params'], sort_keys=True)
+
+    baseline = dict((key(entry), entry) for entry in old['results'])
+    print('{0} -> {1}'.format(old['meta'].get('commit', old_path)[:12], new['meta'].get('commit', new_path)[:12]))
+    for entry in new['results']:
+        before = baseline.get(key(entry))
+        if before is None or 'metrics' not in before or 'metrics' not in entry:
+            continue
+        ratios = []
+        for metric, value in sorted(entry['metrics'].items()):
+            previous = before['metrics'].get(metric)
+            if value is not None and previous:
+                ratios.append('{0}={1:.2f}x'.format(metric, value / float(previous)))
+        print('{0} {1}'.format(name(entry), '  '.join(ratios)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare Pyjo.Reactor.EV, Pyjo.Reactor.Select and raw pyev.')
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help='scenario to run, all by default')
+    parser.add_argument('--backend', action='append', choices=BACKENDS, help='backend to run, all by default')
+    parser.add_argument('--seconds', type=float, default=2.0, help='duration of time based scenarios')
+    parser.add_argument('--count', type=int, default=100000, help='operations of count based scenarios')
+    parser.add_argument('--connections', type=lambda value: [int(n) for n in value.split(',')], default=[1000, 10000, 50000],
+                        help='comma separated numbers of idle connections')
+    parser.add_argument('--http-connections', type=int, default=50, help='keep-alive connections of load generator')
+    parser.add_argument('--http-processes', type=int, default=max(1, multiprocessing.cpu_count() // 2),
+                        help='processes of load generator')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each scenario, median is reported')
+    parser.add_argument('--output', help='write JSON results to file instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files')
+    parser.add_argument('--check', action='store_true', help='run each scenario once with small sizes and fail on errors')
+    opts = parser.parse_args(argv)
+
+    if opts.compare:
+        compare(*opts.compare)
+        return
+
+    opts.scenario = opts.scenario or list(SCENARIOS)
+    opts.backend = opts.backend or list(BACKENDS)
+
+    if opts.check:
+        opts.seconds = 0.2
+        opts.count = 2000
+        opts.connections = [100]
+        opts.http_connections = 4
+        opts.http_processes = 1
+        opts.repeat = 1
+
+        failed = [entry for entry in run(opts)['results'] if 'metrics' not in entry]
+        for entry in failed:
+            sys.stderr.write('not ok {0}\n'.format(summary(entry)))
+        sys.exit(1 if failed else 0)
+
+    data = json.dumps(run(opts), indent=2, sort_keys=True)
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            f.write(data + '\n')
+    else:
+        print(data)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Task switches compared with plain callbacks in :mod:`Pyjo.Reactor.EV`.
+
+Usage:
+
+    python benchmarks/tasks.py [rounds]
+
+Measures ping-pong round trips over a socketpair, once with :meth:`io`
+callbacks and once with two tasks awaiting :meth:`readable`, and futures
+resolved by a recurring callback, once handled by the callback itself and
+once awaited by a task.
+"""
+
+import Pyjo.Reactor.EV
+import Pyjo.Reactor.EV.Future
+
+import socket
+import sys
+import time
+
+
+rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+
+def pingpong_callbacks(reactor):
+    a, b = socket.socketpair()
+    left = [rounds]
+
+    def a_cb(reactor, writable):
+        a.recv(1)
+        left[0] -= 1
+        if left[0]:
+            a.send(b'x')
+        else:
+            reactor.stop()
+
+    def b_cb(reactor, writable):
+        b.send(b.recv(1))
+
+    reactor.io(a_cb, a).watch(a, True, False)
+    reactor.io(b_cb, b).watch(b, True, False)
+    a.send(b'x')
+    reactor.start()
+    reactor.remove(a)
+    reactor.remove(b)
+
+
+def pingpong_tasks(reactor):
+    a, b = socket.socketpair()
+
+    async def ping():
+        for i in range(rounds):
+            a.send(b'x')
+            await reactor.readable(a)
+            a.recv(1)
+        reactor.stop()
+
+    async def pong():
+        while True:
+            await reactor.readable(b)
+            b.send(b.recv(1))
+
+    reactor.spawn(ping())
+    task = reactor.spawn(pong())
+    reactor.start()
+    task.cancel()
+
+
+def futures_callbacks(reactor):
+    left = [rounds]
+
+    def tick_cb(reactor):
+        future = Pyjo.Reactor.EV.Future.new()
+        future.set_result(None)
+        left[0] -= 1
+        if not left[0]:
+            reactor.stop()
+
+    tid = reactor.recurring(tick_cb, 0)
+    reactor.start()
+    reactor.remove(tid)
+
+
+def futures_tasks(reactor):
+    futures = []
+
+    def tick_cb(reactor):
+        if futures:
+            futures.pop().set_result(None)
+
+    async def consumer():
+        for i in range(rounds):
+            future = Pyjo.Reactor.EV.Future.new()
+            futures.append(future)
+            await future
+        reactor.stop()
+
+    tid = reactor.recurring(tick_cb, 0)
+    reactor.spawn(consumer())
+    reactor.start()
+    reactor.remove(tid)
+
+
+reactor = Pyjo.Reactor.EV.new()
+reactor.tick_budget = rounds
+
+for scenario in pingpong_callbacks, pingpong_tasks, futures_callbacks, futures_tasks:
+    t0 = time.time()
+    scenario(reactor)
+    elapsed = time.time() - t0
+    print('{0:<20} {1:>10.0f}/s {2:>8.2f}us'.format(scenario.__name__, rounds / elapsed, elapsed / rounds * 1e6))
@@ -0,0 +1,48 @@
+"""
+Restarting many connection timeouts with :mod:`Pyjo.Reactor.EV`.
+
+Usage:
+
+    python benchmarks/timers.py [timers] [restarts] [resolution]
+
+Creates the given number of 60 seconds timers, restarts random ones the given
+number of times (as each read on a connection would do) and runs a loop
+iteration after every 1000 restarts. Compares a libev watcher for each timer
+with the timing wheel driven by a single libev timer.
+"""
+
+import Pyjo.Reactor.EV
+
+import pyev
+import random
+import sys
+import time
+
+
+timers = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+restarts = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+resolution = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+
+
+def run(name, **kwargs):
+    reactor = Pyjo.Reactor.EV.new(**kwargs)
+    random.seed(0)
+
+    t0 = time.time()
+    tids = [reactor.timer(lambda reactor: None, 60) for i in range(timers)]
+    t1 = time.time()
+    for i in range(restarts):
+        reactor.again(random.choice(tids))
+        if not i % 1000:
+            reactor._loop.start(pyev.EVRUN_NOWAIT)
+    t2 = time.time()
+    for tid in tids:
+        reactor.remove(tid)
+    t3 = time.time()
+
+    print('{0:<8} create {1:>10.0f}/s  again {2:>10.0f}/s  remove {3:>10.0f}/s'.format(
+        name, timers / (t1 - t0), restarts / (t2 - t1), timers / (t3 - t2)))
+
+
+run('heap')
+run('wheel', timer_resolution=resolution)
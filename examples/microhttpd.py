@@ -1,6 +1,7 @@
 import Pyjo.Reactor.EV
 import Pyjo.IOLoop
 
+import signal
 import sys
 
 
@@ -33,4 +34,12 @@ def server(loop, stream, cid):
                 stream.close_gracefully()
 
 
+# Stop gracefully, reactors without signal watchers use Python handlers
+reactor = Pyjo.IOLoop.singleton.reactor
+for signum in signal.SIGINT, signal.SIGTERM:
+    if hasattr(reactor, 'signal'):
+        reactor.signal(lambda reactor, signum: Pyjo.IOLoop.stop(), signum)
+    else:
+        signal.signal(signum, lambda signum, frame: Pyjo.IOLoop.stop())
+
 Pyjo.IOLoop.start()
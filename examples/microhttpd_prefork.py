@@ -0,0 +1,54 @@
+import Pyjo.Reactor.EV.Prefork
+
+import sys
+
+
+opts = dict([['address', '0.0.0.0'], ['port', 8080], ['workers', 0]] + list(map(lambda a: a.split('='), sys.argv[1:])))
+
+prefork = Pyjo.Reactor.EV.Prefork.new()
+if int(opts['workers']):
+    prefork.workers = int(opts['workers'])
+prefork.listen((opts['address'], int(opts['port'])))
+
+
+def worker(reactor, listeners, wid):
+
+    def accept_cb(reactor, connections):
+        for sock, address in connections:
+            reactor.reader(sock, lambda reactor, chunk, sock=sock: read_cb(reactor, sock, chunk))
+
+    def read_cb(reactor, sock, chunk):
+        if chunk is None:
+            sock.close()
+            return
+
+        chunk = chunk.tobytes()
+
+        # Check if we got start line and headers (no body support)
+        if chunk.find(b"\x0d\x0a\x0d\x0a") >= 0:
+
+            if chunk.find(b"\x0d\x0aConnection: Keep-Alive\x0d\x0a") >= 0:
+                keepalive = True
+            else:
+                keepalive = False
+
+            # Write a minimal HTTP response
+            # (the "Hello World!" message has been optimized away!)
+            response = b"HTTP/1.1 200 OK\x0d\x0aContent-Length: 0\x0d\x0a"
+            if keepalive:
+                response += b"Connection: keep-alive\x0d\x0a"
+            response += b"\x0d\x0a"
+
+            if keepalive:
+                reactor.write(sock, response)
+            else:
+                reactor.write(sock, response, lambda reactor: close(reactor, sock))
+
+    def close(reactor, sock):
+        reactor.remove(sock)
+        sock.close()
+
+    reactor.acceptor(listeners[0], accept_cb)
+
+
+prefork.run(worker)
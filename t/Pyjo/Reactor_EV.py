@@ -17,10 +17,17 @@ if __name__ == '__main__':
     from Pyjo.Test import *  # noqa
 
     import Pyjo.Reactor.EV
+    import Pyjo.Reactor.EV.Trace
 
     from Pyjo.Util import setenv, steady_time
 
+    import json
+    import os
+    import pyev
+    import signal
     import socket
+    import tempfile
+    import threading
     import time
 
     from t.lib.Value import Value
@@ -36,6 +43,18 @@ if __name__ == '__main__':
     reactor = Pyjo.IOLoop.singleton.reactor
     is_ok(reactor.__class__.__name__, 'Pyjo_Reactor_EV', 'right object')
 
+    # Backend
+    ok(reactor.backend, 'backend is known')
+    is_ok(Pyjo.Reactor.EV.new(backend='select').backend, 'select', 'right backend')
+    is_ok(Pyjo.Reactor.EV.new(backend='poll', flags='noinotify').backend, 'poll', 'right backend')
+    is_ok(Pyjo.Reactor.EV.new(backend=pyev.EVBACKEND_SELECT).backend, 'select', 'right backend')
+    try:
+        Pyjo.Reactor.EV.new(backend='unknown')
+    except ValueError as e:
+        in_ok(e.args[0], 'unknown', 'right error')
+    else:
+        fail_ok('unknown backend raised ValueError')
+
     # Make sure it stops automatically when not watching for events
     triggered = Value(0)
     Pyjo.IOLoop.next_tick(lambda reactor: triggered.inc())
@@ -118,6 +137,29 @@ if __name__ == '__main__':
     ok(readable.get(), 'handle is readable')
     ok(writable.get(), 'handle is writable')
 
+    # Combined
+    events = []
+    reactor.io(lambda reactor, readable, writable: events.append((readable, writable)), server, combined=True)
+    reactor.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor.start()
+    ok(events, 'handle is ready')
+    in_ok(events, (True, True), 'handle is readable and writable in one call')
+    readable.set(0)
+    writable.set(0)
+    reactor.io(lambda reactor, write: writable.inc() if write else readable.inc(), server)
+
+    # Coalesced changes
+    before = reactor.watch_stats
+    reactor.watch(server, True, False).watch(server, True, True).watch(server, True, True)
+    reactor.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor.start()
+    after = reactor.watch_stats
+    is_ok(after['requested'] - before['requested'], 3, 'right number of requested changes')
+    is_ok(after['coalesced'] - before['coalesced'], 2, 'right number of coalesced changes')
+    is_ok(after['applied'] - before['applied'], 0, 'no changes applied')
+    readable.set(0)
+    writable.set(0)
+
     # Timers
     timer = Value(0)
     recurring = Value(0)
@@ -226,6 +268,15 @@ if __name__ == '__main__':
     ok(not timer.get(), 'timer was not triggered')
     ok(timer2, 'timer was triggered')
 
+    # Watchers are stopped when reactor is gone
+    reactor3 = Pyjo.Reactor.EV.new()
+    loop = reactor3._loop
+    timer3 = Value(0)
+    reactor3.recurring(lambda reactor: timer3.inc(), 0)
+    reactor3 = None
+    loop.start(pyev.EVRUN_NOWAIT)
+    ok(not timer3.get(), 'timer was not triggered')
+
     # Restart timer
     single = Value(0)
     pair = Value(0)
@@ -263,6 +314,465 @@ if __name__ == '__main__':
     ok(single.get(), 'single timer was triggered')
     ok(last.get(), 'timers were triggered in the right order')
 
+    # Timer wheel
+    reactor3 = Pyjo.Reactor.EV.new(timer_resolution=0.01)
+    timer3 = Value(0)
+    recurring3 = Value(0)
+    reactor3.timer(lambda reactor: timer3.inc(), 0.02)
+    reactor3.remove(reactor3.timer(lambda reactor: timer3.inc(), 0.02))
+    tid = reactor3.recurring(lambda reactor: recurring3.inc(), 0.01)
+    reactor3.timer(lambda reactor: reactor.stop(), 0.1)
+    reactor3.start()
+    is_ok(timer3.get(), 1, 'timer was triggered once')
+    ok(recurring3.get() > 1, 'recurring was triggered repeatedly')
+    reactor3.remove(tid)
+    restarted = Value(0)
+    tid = reactor3.timer(lambda reactor: reactor.stop(), 0.05)
+    reactor3.timer(lambda reactor: restarted.set(reactor.again(tid) or 1), 0.03)
+    t = steady_time()
+    reactor3.start()
+    ok(steady_time() - t >= 0.07, 'timer was restarted')
+    is_ok(restarted.get(), 1, 'timer was restarted once')
+    fired = Value(None)
+
+    def fired_cb(reactor):
+        fired.set(steady_time())
+        reactor.stop()
+
+    reactor3.timer(fired_cb, 0.015)
+    reactor3.start()
+    phase = fired.get() / 0.01 % 1
+    ok(min(phase, 1 - phase) < 0.3, 'timer fired at a tick boundary')
+    reactor3 = None
+
+    # Periodic
+    periodic = Value(0)
+    wid = reactor.periodic(lambda reactor: periodic.inc(), 0, 0.01)
+    reactor.timer(lambda reactor: reactor.stop(), 0.05)
+    reactor.start()
+    ok(periodic.get(), 'periodic was triggered')
+    ok(reactor.remove(wid), 'periodic was removed')
+    periodic.set(0)
+    times = []
+
+    def reschedule_cb(reactor, now):
+        times.append(now)
+        return now + 0.01
+
+    wid = reactor.periodic(lambda reactor: periodic.inc(), 0, 0, reschedule_cb)
+    reactor.timer(lambda reactor: reactor.stop(), 0.05)
+    reactor.start()
+    ok(periodic.get(), 'periodic was triggered')
+    ok(times, 'periodic was rescheduled')
+    reactor.remove(wid)
+
+    # Acceptor
+    reactor3 = Pyjo.Reactor.EV.new()
+    listen = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen.bind(('127.0.0.1', 0))
+    listen.listen(5)
+    batches = []
+    reactor3.acceptor(listen, lambda reactor, connections: batches.append(connections), max_per_tick=2)
+    clients = []
+    for i in range(3):
+        clients.append(socket.create_connection(listen.getsockname()))
+    reactor3.one_tick()
+    is_ok(list(map(len, batches)), [2], 'two connections were accepted')
+    reactor3.one_tick()
+    is_ok(list(map(len, batches)), [2, 1], 'one more connection was accepted')
+    conn, address = batches[0][0]
+    is_ok(conn.gettimeout(), 0.0, 'connection is non-blocking')
+    ok(conn.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY), 'connection has TCP_NODELAY')
+    ok(reactor3.remove(listen), 'listening socket was removed')
+    for connections in batches:
+        for conn, address in connections:
+            conn.close()
+    for conn in clients:
+        conn.close()
+    listen.close()
+    reactor3 = None
+
+    # Reader
+    reactor3 = Pyjo.Reactor.EV.new()
+    a, b = socket.socketpair()
+    chunks = []
+    reactor3.reader(a, lambda reactor, data: chunks.append(None if data is None else bytes(data)), bufsize=4)
+    b.sendall(b'hello world')
+    reactor3.one_tick()
+    is_ok(b''.join(chunks), b'hello world', 'data was received')
+    ok(all(len(chunk) <= 4 for chunk in chunks), 'data was received in chunks')
+    del chunks[:]
+    b.close()
+    reactor3.one_tick()
+    is_ok(chunks, [None], 'end of file was reported')
+    ok(not reactor3.remove(a), 'handle was removed')
+    a.close()
+    reactor3 = None
+
+    # Write queue
+    reactor3 = Pyjo.Reactor.EV.new()
+    a, b = socket.socketpair()
+    a.setblocking(False)
+    received = []
+    drained = Value(0)
+    reactor3.reader(b, lambda reactor, data: received.append(bytes(data)))
+    reactor3.write(a, [b'x' * 1000000, bytearray(b'y' * 1000000)])
+    reactor3.write(a, b'z', lambda reactor: drained.inc())
+    ok(a.fileno() in reactor3._ios, 'handle is registered')
+    reactor3.timer(lambda reactor: reactor.stop(), 1)
+    while sum(map(len, received)) < 2000001:
+        reactor3.one_tick()
+    is_ok(drained.get(), 1, 'drain callback was invoked')
+    data = b''.join(received)
+    is_ok(len(data), 2000001, 'all data was written')
+    ok(data.startswith(b'x') and data.endswith(b'yz'), 'data was written in order')
+    reactor3.next_tick(lambda reactor: None)
+    reactor3.one_tick()
+    ok(reactor3._ios[a.fileno()].watcher is None, 'write events are not watched')
+    reactor3.reset()
+    a.close()
+    b.close()
+    reactor3 = None
+
+    # Sendfile
+    reactor3 = Pyjo.Reactor.EV.new()
+    a, b = socket.socketpair()
+    a.setblocking(False)
+    f = tempfile.TemporaryFile()
+    f.write(b'0123456789' * 100000)
+    f.flush()
+    received = []
+    results = []
+    reactor3.reader(b, lambda reactor, data: received.append(bytes(data)))
+    reactor3.write(a, b'header').sendfile(a, f, 10, 999980, lambda reactor, err, sent: results.append((err, sent)))
+    reactor3.write(a, b'footer')
+    reactor3.timer(lambda reactor: reactor.stop(), 1)
+    while sum(map(len, received)) < 999992:
+        reactor3.one_tick()
+    is_ok(results, [(None, 999980)], 'file was sent')
+    data = b''.join(received)
+    ok(data.startswith(b'header0123456789'), 'file was sent after header')
+    ok(data.endswith(b'0123456789footer'), 'footer was sent after file')
+    reactor3.reset()
+    f.close()
+    a.close()
+    b.close()
+    reactor3 = None
+
+    # Priorities
+    reactor3 = Pyjo.Reactor.EV.new()
+    order = []
+    reactor3.timer(lambda reactor: order.append('low'), 0.01, priority=-2)
+    reactor3.timer(lambda reactor: order.append('high'), 0.01, priority=2)
+    reactor3.timer(lambda reactor: order.append('default'), 0.01)
+    reactor3.timer(lambda reactor: reactor.stop(), 0.05)
+    reactor3.start()
+    is_ok(order, ['high', 'default', 'low'], 'timers were triggered by priority')
+    del order[:]
+    a, b = socket.socketpair()
+    reactor3.io(lambda reactor, write: order.append('low'), a, priority=-1).watch(a, False, True)
+    reactor3.io(lambda reactor, write: order.append('high'), b).watch(b, False, True, priority=1)
+    reactor3.one_tick()
+    is_ok(order, ['high', 'low'], 'handles were triggered by priority')
+    del order[:]
+    reactor3.io(lambda reactor, write: order.append('still low'), a).watch(a, False, True)
+    reactor3.one_tick()
+    is_ok(order, ['high', 'still low'], 'priority was kept')
+    reactor3.remove(a)
+    reactor3.remove(b)
+    a.close()
+    b.close()
+    reactor3 = None
+
+    # Run queue
+    reactor3 = Pyjo.Reactor.EV.new()
+    reactor3.tick_budget = 2
+    ticks = Value(0)
+    for i in range(5):
+        reactor3.recurring(lambda reactor: ticks.inc(), 0)
+    reactor3.one_tick()
+    is_ok(ticks.get(), 2, 'only two callbacks were invoked')
+    reactor3.one_tick()
+    is_ok(ticks.get(), 4, 'only two more callbacks were invoked')
+    reactor3.reset()
+    ticks.set(0)
+    reactor3.next_tick(lambda reactor: ticks.inc())
+    reactor3.start()
+    is_ok(ticks.get(), 1, 'next tick was invoked and reactor stopped')
+    reactor3 = None
+
+    # Prepare, check and idle
+    reactor3 = Pyjo.Reactor.EV.new()
+    order = []
+    wids = [
+        reactor3.prepare(lambda reactor: order.append('prepare')),
+        reactor3.check(lambda reactor: order.append('check')),
+        reactor3.idle(lambda reactor: order.append('idle')),
+    ]
+    reactor3.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor3.start()
+    is_ok(order[:2], ['prepare', 'check'], 'prepare before check')
+    ok('idle' in order, 'idle was triggered')
+    for wid in wids:
+        ok(reactor3.remove(wid), 'watcher was removed')
+    del order[:]
+    reactor3.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor3.start()
+    is_ok(order, [], 'watchers were not triggered')
+
+    # Changes made by prepare callback are applied before waiting
+    a, b = socket.socketpair()
+    writes = []
+    reactor3.io(lambda reactor, writable: writes.append(writable) or reactor.stop(), a).watch(a, False, False)
+    wid = reactor3.prepare(lambda reactor: reactor.watch(a, False, True))
+    tid = reactor3.timer(lambda reactor: reactor.stop(), 1)
+    start = time.time()
+    reactor3.start()
+    is_ok(writes, [True], 'handle became writable')
+    ok(time.time() - start < 0.5, 'change was applied in the same iteration')
+    reactor3.remove(wid)
+    reactor3.remove(tid)
+    reactor3.remove(a)
+    a.close()
+    b.close()
+    reactor3 = None
+
+    # Signal
+    signals = []
+    wid = reactor.signal(lambda reactor, signum: signals.append(signum) or reactor.stop(), signal.SIGUSR1)
+    reactor.timer(lambda reactor: os.kill(os.getpid(), signal.SIGUSR1), 0)
+    reactor.start()
+    is_ok(signals, [signal.SIGUSR1], 'signal was delivered')
+    ok(reactor.remove(wid), 'signal watcher was removed')
+    ok(not reactor.remove(wid), 'signal watcher was already removed')
+
+    # Threads
+    results = []
+
+    def thread_cb(reactor, value):
+        results.append(value)
+        if len(results) == 100:
+            reactor.stop()
+
+    def producer():
+        for i in range(100):
+            reactor.call_soon_threadsafe(thread_cb, i)
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    tid = reactor.timer(lambda reactor: reactor.stop(), 1)
+    reactor.start()
+    reactor.remove(tid)
+    thread.join()
+    is_ok(results, list(range(100)), 'callbacks were invoked in order')
+
+    def done_cb(reactor, err, result):
+        results.append((err, result))
+
+    def fail():
+        raise Exception('failed!')
+
+    results = []
+    reactor.run_in_thread(lambda: threading.current_thread().name, done_cb)
+    reactor.run_in_thread(fail, done_cb)
+    while len(results) < 2:
+        reactor.one_tick()
+    err, result = sorted(results, key=lambda r: r[0] is not None)[0]
+    ok(err is None and result != threading.current_thread().name, 'function was called in other thread')
+    err, result = sorted(results, key=lambda r: r[0] is not None)[1]
+    is_ok(err.args[0], 'failed!', 'right error')
+
+    # Stats
+    reactor3 = Pyjo.Reactor.EV.new()
+    ok(reactor3.stats is None, 'no stats')
+    stats = reactor3.enable_stats(lag_interval=0.01)
+    is_ok(stats.__class__.__name__, 'Pyjo_Reactor_EV_Stats', 'right object')
+    is_ok(reactor3.enable_stats(), stats, 'same stats')
+    r, w = socket.socketpair()
+    reactor3.io(lambda reactor, writable: r.recv(1) and time.sleep(0.05), r).watch(r, True, False)
+    tid = reactor3.timer(lambda reactor: w.send(b'x'), 0.01)
+    reactor3.timer(lambda reactor: reactor.stop(), 0.1)
+    reactor3.start()
+    ok(stats.iterations > 1, 'loop iterations were counted')
+    ok(stats.pending >= stats.iterations, 'pending events were counted')
+    ok(stats.blocked > 0.02, 'time blocked was measured')
+    ok(stats.busy >= 0.05, 'time in callbacks was measured')
+    ok(stats.max_lag >= 0.02, 'lag was measured')
+    histogram = stats.callbacks[r.fileno()]
+    is_ok(histogram.count, 1, 'callback of handle was timed')
+    ok(histogram.max >= 0.05, 'right duration')
+    is_ok(histogram.counts, [0, 0, 0, 0, 1, 0, 0], 'right bucket')
+    is_ok(stats.callbacks[tid].count, 1, 'callback of timer was timed')
+    is_ok(stats.as_dict()['callbacks'][str(r.fileno())]['buckets'], [0, 0, 0, 0, 1, 0, 0], 'right bucket')
+    stats.reset()
+    is_ok(stats.iterations, 0, 'counters were reset')
+    is_ok(reactor3.disable_stats(), stats, 'stats were disabled')
+    ok(reactor3.stats is None, 'no stats')
+    ok(reactor3.disable_stats() is None, 'stats were already disabled')
+    w.send(b'x')
+    reactor3.timer(lambda reactor: reactor.stop(), 0.05)
+    reactor3.start()
+    ok(not stats.callbacks, 'nothing was timed')
+    reactor3.remove(r)
+    r.close()
+    w.close()
+    stats = reactor3.enable_stats()
+    reactor3.timer(lambda reactor: None, 0.01)
+    reactor3.start()
+    ok(True, 'stats watchers do not keep reactor running')
+
+    # Time between loop runs is not counted
+    reactor3.timer(lambda reactor: reactor.stop(), 0.01)
+    reactor3.start()
+    stats.reset()
+    time.sleep(0.2)
+    reactor3.timer(lambda reactor: reactor.stop(), 0.01)
+    reactor3.start()
+    reactor3.one_tick()
+    time.sleep(0.2)
+    reactor3.timer(lambda reactor: reactor.stop(), 0.01)
+    reactor3.start()
+    ok(stats.busy + stats.blocked < 0.15, 'time outside of loop was not counted')
+    reactor3 = None
+
+    # Trace
+    trace = Pyjo.Reactor.EV.Trace.new(4)
+    for i in range(6):
+        trace.record('timer', i, i, i + 0.5)
+    is_ok(len(trace), 4, 'right number of events')
+    is_ok([key for kind, key, start, end in trace.events()], [2, 3, 4, 5], 'oldest events were dropped')
+    is_ok([key for kind, key, start, end in trace.events(seconds=1)], [4, 5], 'right events')
+    event = trace.to_dict()['traceEvents'][0]
+    is_ok((event['name'], event['ph'], event['ts'], event['dur']), ('timer 2', 'X', 2e6, 0.5e6), 'right event')
+    trace.clear()
+    is_ok(len(trace), 0, 'no events')
+
+    reactor3 = Pyjo.Reactor.EV.new()
+    reactor3.unsubscribe('error').on(lambda reactor, e, event: None, 'error')
+    trace = reactor3.enable_trace(size=1000)
+    is_ok(trace.__class__.__name__, 'Pyjo_Reactor_EV_Trace', 'right object')
+    is_ok(reactor3.enable_trace(), trace, 'same trace')
+    r, w = socket.socketpair()
+    reactor3.io(lambda reactor, writable: r.recv(1), r).watch(r, True, False)
+    tid = reactor3.timer(lambda reactor: w.send(b'x'), 0.01)
+    reactor3.next_tick(lambda reactor: None)
+
+    def die_cb(reactor):
+        raise Exception('traced')
+
+    reactor3.timer(die_cb, 0.02)
+    reactor3.timer(lambda reactor: reactor.stop(), 0.05)
+    reactor3.start()
+    events = list(trace.events())
+    ok(('watch', 1) in [(kind, key) for kind, key, start, end in events], 'watch change was recorded')
+    ok('soon' in [kind for kind, key, start, end in events], 'next tick was recorded')
+    ok(('timer', tid) in [(kind, key) for kind, key, start, end in events], 'timer was recorded')
+    ok(('read', r.fileno()) in [(kind, key) for kind, key, start, end in events], 'read was recorded')
+    errors = [key for kind, key, start, end in events if kind == 'error']
+    is_ok(len(errors), 1, 'error was recorded')
+    in_ok(errors[0], 'traced', 'right error')
+    ok(all(start <= end for kind, key, start, end in events), 'right times')
+    path = os.path.join(tempfile.mkdtemp(), 'trace.json')
+    trace.dump(path)
+    with open(path) as f:
+        is_ok(len(json.load(f)['traceEvents']), len(events), 'trace was dumped')
+    is_ok(reactor3.disable_trace(), trace, 'trace was disabled')
+    ok('emit' not in reactor3.__dict__ and '_io' not in reactor3.__dict__, 'dispatch methods were restored')
+    ok(reactor3.disable_trace() is None, 'trace was already disabled')
+
+    path = os.path.join(tempfile.mkdtemp(), 'trace-{pid}.json')
+    trace = reactor3.enable_trace(signum=signal.SIGUSR2, path=path)
+    stats = reactor3.enable_stats()
+    reactor3.timer(lambda reactor: os.kill(os.getpid(), signal.SIGUSR2), 0.01)
+    reactor3.timer(lambda reactor: reactor.stop(), 0.05)
+    reactor3.start()
+    ok(os.path.exists(path.format(pid=os.getpid())), 'trace was dumped on signal')
+    ok(stats.callbacks and len(trace), 'stats and trace were both collected')
+    reactor3.disable_trace()
+    reactor3.disable_stats()
+    reactor3.remove(r)
+    r.close()
+    w.close()
+    reactor3 = None
+
+    # Profiler
+    reactor3 = Pyjo.Reactor.EV.new()
+    profiler = reactor3.enable_profiler(interval=0.001)
+    is_ok(profiler.__class__.__name__, 'Pyjo_Reactor_EV_Profiler', 'right object')
+    is_ok(reactor3.enable_profiler(), profiler, 'same profiler')
+
+    def busy_cb(reactor):
+        end = time.time() + 0.1
+        while time.time() < end:
+            pass
+
+    tid = reactor3.timer(busy_cb, 0.1)
+    reactor3.timer(lambda reactor: reactor.stop(), 0.3)
+    reactor3.start()
+    busy = sum(profiler.samples.values())
+    busy_cb(reactor3)
+    is_ok(sum(profiler.samples.values()), busy, 'code between loop runs was not sampled')
+    is_ok(reactor3.disable_profiler(), profiler, 'profiler was disabled')
+    ok(not profiler._thread.is_alive(), 'profiler thread is gone')
+    ok(reactor3.disable_profiler() is None, 'profiler was already disabled')
+    ok(profiler.idle, 'idle samples were counted')
+    busy = [stack for stack in profiler.samples if stack.startswith('{0} '.format(tid))]
+    is_ok(len(busy), 1, 'busy callback was sampled')
+    in_ok(busy[0], 'busy_cb', 'right callback')
+    ok(busy[0].split(';')[-1].startswith('busy_cb ('), 'callback is on top of stack')
+    lines = profiler.collapsed().splitlines()
+    is_ok(len(lines), len(profiler.samples), 'right number of lines')
+    ok(lines[0].startswith(busy[0] + ' '), 'most frequent stack first')
+    ok(all(line.rsplit(' ', 1)[1].isdigit() for line in lines), 'right format')
+    path = os.path.join(tempfile.mkdtemp(), 'reactor.collapsed')
+    profiler.dump(path)
+    with open(path) as f:
+        is_ok(f.read(), profiler.collapsed(), 'samples were dumped')
+    profiler.clear()
+    is_ok((profiler.idle, profiler.samples), (0, {}), 'samples were removed')
+    reactor3 = None
+
+    # Watchdog
+    reactor3 = Pyjo.Reactor.EV.new()
+    stalls = []
+
+    def stall_cb(watchdog, elapsed, key, cb, stack):
+        stalls.append((elapsed, key, cb, stack))
+
+    watchdog = reactor3.enable_watchdog(threshold=0.05, cb=stall_cb)
+    is_ok(watchdog.__class__.__name__, 'Pyjo_Reactor_EV_Watchdog', 'right object')
+    is_ok(reactor3.enable_watchdog(), watchdog, 'same watchdog')
+
+    def blocking_cb(reactor):
+        time.sleep(0.2)
+
+    r, w = socket.socketpair()
+    reactor3.io(lambda reactor, writable: r.recv(1) and blocking_cb(reactor), r).watch(r, True, False)
+    tid = reactor3.timer(blocking_cb, 0.01)
+    reactor3.timer(lambda reactor: w.send(b'x'), 0.3)
+    reactor3.timer(lambda reactor: reactor.stop(), 0.7)
+    reactor3.start()
+    is_ok(len(stalls), 2, 'two stalls were reported')
+    ok(stalls[0][0] >= 0.05, 'right duration')
+    is_ok(stalls[0][1], tid, 'right timer')
+    is_ok(stalls[0][2], blocking_cb, 'right callback')
+    in_ok(stalls[0][3], 'time.sleep(0.2)', 'right stack')
+    is_ok(stalls[1][1], r.fileno(), 'right handle')
+    in_ok(stalls[1][3], 'blocking_cb(reactor)', 'right stack')
+    is_ok(watchdog.stalls, 2, 'right number of stalls')
+    time.sleep(0.15)
+    reactor3.timer(lambda reactor: None, 0)
+    reactor3.one_tick()
+    time.sleep(0.15)
+    is_ok(watchdog.stalls, 2, 'code between loop runs is not a stall')
+    is_ok(reactor3.disable_watchdog(), watchdog, 'watchdog was disabled')
+    ok(not watchdog._thread.is_alive(), 'watchdog thread is gone')
+    ok(reactor3.disable_watchdog() is None, 'watchdog was already disabled')
+    reactor3.remove(r)
+    r.close()
+    w.close()
+    reactor3 = None
+
     # Error
     err = Value('')
 
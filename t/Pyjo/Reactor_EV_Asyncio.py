@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    import sys
+
+    if sys.version_info < (3, 7):
+        plan_skip_all('asyncio of Python 3.7 or newer required')
+
+    import Pyjo.Reactor.EV
+
+    # Native coroutines are kept apart, older Pythons can not parse them
+    import t.lib.Coroutines
+    t.lib.Coroutines.test_asyncio(Pyjo.Reactor.EV.new())
+
+    done_testing()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    import Pyjo.Reactor.EV
+    import Pyjo.Reactor.EV.Future
+
+    import socket
+    import sys
+    import time
+
+    from Pyjo.Reactor.EV.Future import Return
+
+    from t.lib.Value import Value
+
+    # Instantiation
+    reactor = Pyjo.Reactor.EV.new()
+    future = reactor.sleep(0.01)
+    is_ok(future.__class__.__name__, 'Pyjo_Reactor_EV_Future', 'right object')
+    ok(not future.done(), 'future is not done')
+    throws_ok(lambda: future.result(), Pyjo.Reactor.EV.Future.InvalidStateError, 'result of pending future')
+    ok(future.cancel(), 'future was cancelled')
+    ok(future.cancelled(), 'future is cancelled')
+    ok(not future.cancel(), 'future was not cancelled again')
+
+    # Generators work with all Python versions
+    def sleeper():
+        t0 = time.time()
+        yield reactor.sleep(0.05)
+        yield reactor.sleep(0)
+        raise Return(time.time() - t0)
+
+    task = reactor.spawn(sleeper())
+    is_ok(task.__class__.__name__, 'Pyjo_Reactor_EV_Task', 'right object')
+    task.add_done_callback(lambda task: reactor.stop())
+    reactor.start()
+    ok(task.done(), 'task is done')
+    ok(task.result() >= 0.04, 'slept long enough')
+
+    # Readable and writable
+    r, w = socket.socketpair()
+    r.setblocking(False)
+    w.setblocking(False)
+
+    def ping():
+        yield reactor.writable(w)
+        w.send(b'ping')
+
+    def pong():
+        yield reactor.readable(r)
+        raise Return(r.recv(4))
+
+    reactor.spawn(ping())
+    task = reactor.spawn(pong())
+    task.add_done_callback(lambda task: reactor.stop())
+    reactor.start()
+    is_ok(task.result(), b'ping', 'right data')
+    ok(not reactor._resolving, 'no watchers left')
+
+    # Watchers are reused
+    spare = len(reactor._spare_ios) + len(reactor._spare_timers)
+
+    def many():
+        for i in range(10):
+            yield reactor.sleep(0)
+
+    reactor.spawn(many()).add_done_callback(lambda task: reactor.stop())
+    reactor.start()
+    is_ok(len(reactor._spare_ios) + len(reactor._spare_timers), spare, 'no new watchers')
+
+    # Waiting for tasks and plain futures
+    future = Pyjo.Reactor.EV.Future.new()
+
+    def inner():
+        value = yield future
+        raise Return(value * 2)
+
+    def outer():
+        value = yield reactor.spawn(inner())
+        raise Return(value + 1)
+
+    task = reactor.spawn(outer())
+    task.add_done_callback(lambda task: reactor.stop())
+    reactor.timer(lambda reactor: future.set_result(20), 0.01)
+    reactor.start()
+    is_ok(task.result(), 41, 'right result')
+
+    # Generator without result
+    task = reactor.spawn(many())
+    task.add_done_callback(lambda task: reactor.stop())
+    reactor.start()
+    ok(task.result() is None, 'no result')
+
+    # Cancel
+    def cancelled():
+        try:
+            yield reactor.sleep(10)
+        except Pyjo.Reactor.EV.Future.CancelledError:
+            raise Return('cancelled')
+
+    task = reactor.spawn(cancelled())
+    reactor.timer(lambda reactor: task.cancel(), 0.01)
+    task.add_done_callback(lambda task: reactor.stop())
+    reactor.start()
+    is_ok(task.result(), 'cancelled', 'task was cancelled')
+    ok(not reactor._resolving, 'no watchers left')
+
+    # Error
+    err = Value(None)
+
+    def error_cb(reactor, e, event):
+        err.set(e)
+
+    reactor.unsubscribe('error').on(error_cb, 'error')
+
+    def failing():
+        yield reactor.sleep(0)
+        raise Exception('Whatever')
+
+    task = reactor.spawn(failing())
+    reactor.timer(lambda reactor: reactor.stop(), 0.01)
+    reactor.start()
+    is_ok(str(err.get()), 'Whatever', 'error was reported')
+    is_ok(str(task.exception()), 'Whatever', 'right exception')
+
+    # Error from done callback
+    err.set(None)
+    triggered = []
+    future = reactor.sleep(0)
+    future.add_done_callback(lambda future: 1 / 0)
+    future.add_done_callback(lambda future: triggered.append(future))
+    reactor.timer(lambda reactor: reactor.stop(), 0.01)
+    reactor.start()
+    ok(isinstance(err.get(), ZeroDivisionError), 'error from callback was reported')
+    is_ok(triggered, [future], 'next callback was invoked')
+    ok(not reactor._resolving, 'no watchers left')
+
+    # Reset
+    task = reactor.spawn(sleeper())
+    reactor.one_tick()
+    reactor.reset()
+    ok(not reactor._resolving, 'no watchers left')
+    ok(not task.done(), 'task is not done')
+
+    # Native coroutines are kept apart, older Pythons can not parse them
+    if sys.version_info >= (3, 5):
+        import t.lib.Coroutines
+        t.lib.Coroutines.test_future(Pyjo.Reactor.EV.new())
+
+    done_testing()
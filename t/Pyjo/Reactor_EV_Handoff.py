@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    import errno
+    import os
+    import socket
+    import sys
+    import threading
+    import time
+
+    if sys.version_info < (3, 3) or not hasattr(socket, 'SOCK_SEQPACKET') or not hasattr(os, 'fork'):
+        plan_skip_all('Python 3, SOCK_SEQPACKET and fork required')
+
+    import Pyjo.Reactor.EV
+    import Pyjo.Reactor.EV.Handoff
+
+    # Instantiation
+    handoff = Pyjo.Reactor.EV.Handoff.new(workers=2, report_interval=0.05)
+    is_ok(handoff.__class__.__name__, 'Pyjo_Reactor_EV_Handoff', 'right object')
+    is_ok(handoff.balance, 'connections', 'right default')
+    address = handoff.listen(('127.0.0.1', 0))
+    ok(address[1], 'port was chosen')
+
+    # Workers keep connections open
+    def worker(reactor, listeners, wid):
+
+        def accept_cb(reactor, connections):
+            for sock, address in connections:
+                sock.setblocking(True)
+                sock.sendall('{0} {1}'.format(wid, address[1]).encode('ascii'))
+                sock.setblocking(False)
+                reactor.reader(sock, lambda reactor, data, sock=sock: data is None and sock.close())
+
+        reactor.acceptor(listeners[0], accept_cb)
+
+    clients = []
+    answers = []
+    loads = []
+
+    def connect():
+        sock = socket.create_connection(address)
+        wid, port = sock.recv(100).decode('ascii').split()
+        answers.append((int(wid), int(port) == sock.getsockname()[1]))
+        clients.append(sock)
+
+    # Clients block, supervisor keeps running
+    def clients_thread():
+        for i in range(4):
+            connect()
+
+        time.sleep(0.3)
+        loads.append(handoff.loads)
+
+        # Both workers report 2 connections, now close those of worker 0
+        for sock, answer in list(zip(clients, answers)):
+            if answer[0] == 0:
+                sock.close()
+
+        time.sleep(0.3)
+        loads.append(handoff.loads)
+
+        for i in range(2):
+            connect()
+
+        handoff.reactor.call_soon_threadsafe(lambda reactor: handoff.stop())
+
+    thread = threading.Thread(target=clients_thread)
+    handoff.reactor.timer(lambda reactor: thread.start(), 0.5)
+    handoff.run(worker)
+    thread.join()
+
+    ok(all(right for wid, right in answers), 'right peer addresses')
+    is_ok(sorted(wid for wid, right in answers[:4]), [0, 0, 1, 1], 'connections were balanced')
+    is_ok(loads[0], {0: (2, loads[0][0][1]), 1: (2, loads[0][1][1])}, 'right loads')
+    is_ok(loads[1][0][0], 0, 'connections of worker 0 are gone')
+    is_ok([wid for wid, right in answers[4:]], [0, 0], 'least loaded worker was chosen')
+    ok(not handoff.loads, 'no workers left')
+
+    for sock in clients:
+        sock.close()
+
+    # Full channels are skipped
+    class Channel(object):
+
+        def __init__(self, full):
+            self.full = full
+            self.sent = 0
+
+        def sendmsg(self, buffers, ancdata):
+            if self.full:
+                raise socket.error(errno.EAGAIN, 'Full')
+            self.sent += 1
+
+    handoff = Pyjo.Reactor.EV.Handoff.new(workers=2)
+    drops = []
+    handoff.on(lambda handoff, address: drops.append(address), 'drop')
+    full, idle = Channel(True), Channel(False)
+    handoff._loads = {0: Pyjo.Reactor.EV.Handoff.WorkerLoad(0, [full]), 1: Pyjo.Reactor.EV.Handoff.WorkerLoad(1, [idle])}
+    handoff._loads[1].connections = 10
+    a, b = socket.socketpair()
+    handoff._handoff(0, [(a, 'client')])
+    is_ok((full.sent, idle.sent), (0, 1), 'connection was handed to next worker')
+    is_ok((handoff.dropped, drops), (0, []), 'no connection was dropped')
+
+    idle.full = True
+    a, b2 = socket.socketpair()
+    handoff._handoff(0, [(a, 'client')])
+    is_ok((handoff.dropped, drops), (1, ['client']), 'connection was dropped')
+    is_ok(sorted(handoff.loads), [0, 1], 'workers were kept')
+    b.close()
+    b2.close()
+
+    done_testing()
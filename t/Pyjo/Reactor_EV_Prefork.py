@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    import Pyjo.Reactor.EV
+    import Pyjo.Reactor.EV.Prefork
+
+    import os
+    import signal
+    import socket
+
+    if not hasattr(socket, 'SO_REUSEPORT') or not hasattr(os, 'fork'):
+        plan_skip_all('SO_REUSEPORT and fork required')
+
+    # Instantiation
+    prefork = Pyjo.Reactor.EV.Prefork.new(workers=2, restart_delay=0.1)
+    is_ok(prefork.__class__.__name__, 'Pyjo_Reactor_EV_Prefork', 'right object')
+    is_ok(prefork.reactor.__class__.__name__, 'Pyjo_Reactor_EV', 'right object')
+    address = prefork.listen(('127.0.0.1', 0))
+    ok(address[1], 'port was chosen')
+
+    # Workers
+    spawned = []
+    reaped = []
+
+    @prefork.on
+    def spawn(prefork, pid, wid):
+        spawned.append((pid, wid))
+
+    @prefork.on
+    def reap(prefork, pid, wid, status):
+        reaped.append((pid, wid, status))
+
+    def worker(reactor, listeners, wid):
+
+        def accept_cb(reactor, connections):
+            for sock, address in connections:
+                sock.setblocking(True)
+                sock.sendall('{0} {1} {2}'.format(os.getpid(), wid, len(prefork.reactor._watchers)).encode('ascii'))
+                sock.close()
+
+        reactor.acceptor(listeners[0], accept_cb)
+
+    inherited = set()
+
+    def request():
+        sock = socket.create_connection(address)
+        pid, wid, watchers = sock.recv(100).decode('ascii').split()
+        sock.close()
+        inherited.add(int(watchers))
+        return int(pid), int(wid)
+
+    answers = set()
+    restarted = []
+
+    def requests_cb(reactor):
+        for i in range(20):
+            answers.add(request())
+        os.kill(spawned[0][0], signal.SIGKILL)
+        reactor.timer(restarted_cb, 0.5)
+
+    def restarted_cb(reactor):
+        restarted.append(request())
+        prefork.stop()
+
+    prefork.reactor.timer(requests_cb, 0.5)
+    prefork.run(worker)
+
+    ok(answers <= set(spawned[:2]), 'answered by workers')
+    is_ok(sorted(wid for pid, wid in spawned[:2]), [0, 1], 'right workers')
+    is_ok(len(spawned), 3, 'worker was restarted')
+    is_ok(spawned[2][1], spawned[0][1], 'right worker number')
+    is_ok(len(reaped), 3, 'all workers were reaped')
+    is_ok(reaped[0][0], spawned[0][0], 'killed worker was reaped first')
+    ok(os.WIFSIGNALED(reaped[0][2]), 'worker was killed')
+    ok(all(os.WIFEXITED(status) and not os.WEXITSTATUS(status) for pid, wid, status in reaped[1:]), 'workers stopped gracefully')
+    ok(restarted[0] in spawned[1:], 'answered by running worker')
+    ok(not prefork.reactor._timers, 'no timers left')
+    is_ok(inherited, set([0]), 'signal watchers of supervisor were stopped in workers')
+    ok(not prefork.reactor._watchers, 'no signal watchers left')
+
+    done_testing()
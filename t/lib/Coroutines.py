@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+# Tests with native coroutines, imported only by Python 3.5 and newer
+
+from Pyjo.Test import *  # noqa
+
+import Pyjo.Reactor.EV.Future
+
+import asyncio
+import socket
+import threading
+import time
+
+
+def test_asyncio(reactor):
+    import Pyjo.Reactor.EV.Asyncio
+
+    # Instantiation
+    loop = Pyjo.Reactor.EV.Asyncio.new(reactor)
+    is_ok(loop.__class__.__name__, 'Pyjo_Reactor_EV_Asyncio', 'right object')
+    ok(isinstance(loop, asyncio.AbstractEventLoop), 'right base class')
+    is_ok(loop.reactor, reactor, 'right reactor')
+    ok(not reactor._ios, 'no self pipe is watched')
+    asyncio.set_event_loop(loop)
+
+    # Callbacks and timers
+    order = []
+
+    async def callbacks():
+        loop.call_soon(order.append, 1)
+        loop.call_later(0.01, order.append, 3)
+        loop.call_soon(order.append, 2)
+        loop.call_later(0.005, order.append, 'cancelled').cancel()
+        await asyncio.sleep(0.02)
+
+    loop.run_until_complete(callbacks())
+    is_ok(order, [1, 2, 3], 'callbacks were invoked in the right order')
+    ok(not loop.is_running(), 'loop is not running')
+
+    # Readers
+    async def readers():
+        r, w = socket.socketpair()
+        fut = loop.create_future()
+        loop.add_reader(r, lambda: fut.set_result(r.recv(100)))
+        w.send(b'hello')
+        data = await fut
+        ok(loop.remove_reader(r), 'reader was removed')
+        r.close()
+        w.close()
+        return data
+
+    is_ok(loop.run_until_complete(readers()), b'hello', 'right data')
+
+    # Streams
+    async def echo(reader, writer):
+        while True:
+            data = await reader.read(100)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+        writer.close()
+
+    async def streams():
+        server = await asyncio.start_server(echo, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        received = []
+        for i in range(10):
+            writer.write(b'ping')
+            await writer.drain()
+            received.append(await reader.readexactly(4))
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return received
+
+    is_ok(loop.run_until_complete(streams()), [b'ping'] * 10, 'right data')
+
+    # Threads
+    async def threads():
+        fut = loop.create_future()
+
+        def worker():
+            time.sleep(0.01)
+            loop.call_soon_threadsafe(fut.set_result, 42)
+
+        threading.Thread(target=worker).start()
+        name = await loop.run_in_executor(None, lambda: threading.current_thread().name)
+        return await fut, name
+
+    result, name = loop.run_until_complete(threads())
+    is_ok(result, 42, 'right result')
+    ok(name != threading.current_thread().name, 'function was called in other thread')
+
+    # Waiting only for threads does not keep the reactor busy
+    async def waiting():
+        await loop.run_in_executor(None, time.sleep, 0.2)
+
+    t0 = time.process_time()
+    loop.run_until_complete(waiting())
+    ok(time.process_time() - t0 < 0.1, 'reactor waited for thread')
+
+    # Cancel
+    async def cancel():
+        task = asyncio.ensure_future(asyncio.sleep(10))
+        await asyncio.sleep(0)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+
+    ok(loop.run_until_complete(cancel()), 'task was cancelled')
+    is_ok(loop.run_until_complete(asyncio.wait_for(asyncio.sleep(0.01, 'done'), 1)), 'done', 'right result')
+
+    # Pyjo and asyncio share reactor
+    triggered = []
+    reactor.timer(lambda reactor: triggered.append('pyjo'), 0.01)
+    loop.run_until_complete(asyncio.sleep(0.02))
+    is_ok(triggered, ['pyjo'], 'reactor timer was triggered by asyncio loop')
+
+    # Close
+    loop.call_later(10, order.append, 'never')
+    loop.close()
+    ok(loop.is_closed(), 'loop is closed')
+    ok(not reactor._timers, 'timers were removed from reactor')
+    ok(not reactor._ios, 'handles were removed from reactor')
+
+
+def test_future(reactor):
+
+    # Sleep
+    async def sleeper():
+        t0 = time.time()
+        await reactor.sleep(0.05)
+        await reactor.sleep(0)
+        return time.time() - t0
+
+    task = reactor.spawn(sleeper())
+    task.add_done_callback(lambda task: reactor.stop())
+    reactor.start()
+    ok(task.done(), 'coroutine is done')
+    ok(task.result() >= 0.04, 'coroutine slept long enough')
+
+    # Readable and writable
+    r, w = socket.socketpair()
+    r.setblocking(False)
+    w.setblocking(False)
+
+    async def ping():
+        await reactor.writable(w)
+        w.send(b'ping')
+
+    async def pong():
+        await reactor.readable(r)
+        return r.recv(4)
+
+    reactor.spawn(ping())
+    task = reactor.spawn(pong())
+    task.add_done_callback(lambda task: reactor.stop())
+    reactor.start()
+    is_ok(task.result(), b'ping', 'right data from coroutine')
+    ok(not reactor._resolving, 'no watchers left')
+    r.close()
+    w.close()
+
+    # Awaiting tasks, plain futures and generators
+    future = Pyjo.Reactor.EV.Future.new()
+
+    async def inner():
+        return await future * 2
+
+    async def outer():
+        return await reactor.spawn(inner()) + 1
+
+    def generator():
+        value = yield reactor.spawn(outer())
+        raise Pyjo.Reactor.EV.Future.Return(value + 1)
+
+    task = reactor.spawn(generator())
+    task.add_done_callback(lambda task: reactor.stop())
+    reactor.timer(lambda reactor: future.set_result(20), 0.01)
+    reactor.start()
+    is_ok(task.result(), 42, 'right result from coroutines')
+
+    # Cancel
+    async def cancelled():
+        try:
+            await reactor.sleep(10)
+        except Pyjo.Reactor.EV.Future.CancelledError:
+            return 'cancelled'
+
+    task = reactor.spawn(cancelled())
+    reactor.timer(lambda reactor: task.cancel(), 0.01)
+    task.add_done_callback(lambda task: reactor.stop())
+    reactor.start()
+    is_ok(task.result(), 'cancelled', 'coroutine was cancelled')
+    ok(not reactor._resolving, 'no watchers left')
+
+    # Error
+    errors = []
+    reactor.unsubscribe('error').on(lambda reactor, e, event: errors.append(e), 'error')
+
+    async def failing():
+        await reactor.sleep(0)
+        raise Exception('Whatever')
+
+    task = reactor.spawn(failing())
+    reactor.timer(lambda reactor: reactor.stop(), 0.01)
+    reactor.start()
+    is_ok([str(e) for e in errors], ['Whatever'], 'error from coroutine was reported')
+    is_ok(str(task.exception()), 'Whatever', 'right exception from coroutine')